@@ -53,6 +53,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 
     # Third‑party apps (add as you use)
     "rest_framework",
@@ -72,6 +73,8 @@ AUTH_USER_MODEL = "accounts.User"
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",       # serves STATIC_ROOT
+    "core.instrumentation.RequestMetricsMiddleware",   # query/latency metrics
     "corsheaders.middleware.CorsMiddleware",           # if using CORS
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -85,7 +88,8 @@ ROOT_URLCONF = "RoydClinic.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates that also times renders for request metrics
+        "BACKEND": "core.instrumentation.InstrumentedDjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -101,6 +105,42 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "RoydClinic.wsgi.application"
 
+# Database connections
+# DB_CONN_MAX_AGE is how many seconds a worker keeps its connection open
+# between requests (0 closes it after every request, "none" keeps it for
+# the lifetime of the process). Health checks test a reused connection
+# before the request uses it, so a restarted database does not fail the
+# first request of every worker.
+# DB_POOL=true uses psycopg 3's connection pool instead (requires
+# psycopg[pool]); Django does not allow persistent connections together
+# with a pool, so DB_CONN_MAX_AGE is ignored then.
+DB_CONN_MAX_AGE = os.environ.get("DB_CONN_MAX_AGE", "60")
+DB_CONN_MAX_AGE = (
+    None if DB_CONN_MAX_AGE.lower() == "none" else int(DB_CONN_MAX_AGE)
+)
+DB_CONN_HEALTH_CHECKS = (
+    os.environ.get("DB_CONN_HEALTH_CHECKS", "True").lower() == "true"
+)
+DB_POOL = os.environ.get("DB_POOL", "False").lower() == "true"
+
+if DB_POOL:
+    DATABASE_CONNECTION = {
+        "CONN_MAX_AGE": 0,
+        "OPTIONS": {
+            "pool": {
+                "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 1)),
+                "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 4)),
+                # Seconds a request waits for a free connection
+                "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+            },
+        },
+    }
+else:
+    DATABASE_CONNECTION = {
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
+    }
+
 # Default database placeholder – override in dev.py / prod.py
 DATABASES = {
     "default": {
@@ -110,9 +150,81 @@ DATABASES = {
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
         "HOST": os.environ.get("POSTGRES_HOST", "db"),
         "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        **DATABASE_CONNECTION,
+    }
+}
+
+# Bearer token for the monitoring endpoints (staff users need no token)
+MONITORING_TOKEN = os.environ.get("MONITORING_TOKEN", "")
+
+# Cache
+# CACHE_BACKEND is one of "locmem" (per process, the default), "file" or
+# "redis" (redis-py, in requirements.txt). Use "file" or "redis" when running
+# several workers so cache invalidation is shared between them.
+CACHE_BACKENDS = {
+    "locmem": (
+        "django.core.cache.backends.locmem.LocMemCache",
+        "roydclinic",
+    ),
+    "file": (
+        "django.core.cache.backends.filebased.FileBasedCache",
+        str(BASE_DIR / ".cache"),
+    ),
+    "redis": (
+        "django.core.cache.backends.redis.RedisCache",
+        "redis://redis:6379/1",
+    ),
+}
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "locmem")
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND][0],
+        "LOCATION": os.environ.get(
+            "CACHE_LOCATION", CACHE_BACKENDS[CACHE_BACKEND][1]
+        ),
+        "TIMEOUT": int(os.environ.get("CACHE_TIMEOUT", "300")),
+        "KEY_PREFIX": "roydclinic",
     }
 }
 
+# Seconds a rendered public doctor profile stays cached. Edits invalidate
+# it immediately through doctors.cache versioning.
+DOCTOR_PROFILE_CACHE_TIMEOUT = int(
+    os.environ.get("DOCTOR_PROFILE_CACHE_TIMEOUT", "3600")
+)
+
+# Seconds the unfiltered doctor directory facet counts stay cached. Profile
+# changes invalidate them immediately (see doctors.facets).
+DOCTOR_FACETS_CACHE_TIMEOUT = int(
+    os.environ.get("DOCTOR_FACETS_CACHE_TIMEOUT", "3600")
+)
+
+# Bounds of the doctor directory price facet buckets, in the consultation
+# currency (VND; consultations cost about 200,000 to 1,000,000). N bounds
+# make N + 1 buckets: under the first, between neighbours, over the last.
+DOCTOR_PRICE_BUCKET_BOUNDS = [
+    int(bound)
+    for bound in os.environ.get(
+        "DOCTOR_PRICE_BUCKET_BOUNDS", "300000,500000,700000"
+    ).split(",")
+]
+
+# Seconds a patient's selected slot stays reserved for them before booking
+SLOT_HOLD_TTL = int(os.environ.get("SLOT_HOLD_TTL", "300"))
+
+# Background jobs (core.jobs, run by `manage.py worker`). A failed job is
+# retried up to JOBS_MAX_ATTEMPTS times, JOBS_BACKOFF_BASE seconds after the
+# first failure and twice as long after each next one, up to
+# JOBS_BACKOFF_MAX. Jobs running for JOBS_STALE_AFTER seconds are assumed
+# lost with their worker and queued again.
+JOBS_MAX_ATTEMPTS = int(os.environ.get("JOBS_MAX_ATTEMPTS", "5"))
+JOBS_BACKOFF_BASE = int(os.environ.get("JOBS_BACKOFF_BASE", "10"))
+JOBS_BACKOFF_MAX = int(os.environ.get("JOBS_BACKOFF_MAX", "3600"))
+JOBS_STALE_AFTER = int(os.environ.get("JOBS_STALE_AFTER", "600"))
+# Seconds an idle worker waits before polling the queue again
+JOBS_POLL_INTERVAL = float(os.environ.get("JOBS_POLL_INTERVAL", "1"))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -134,11 +246,51 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 
 STATICFILES_DIRS = [BASE_DIR / "static"]
 
+# collectstatic writes content-hashed copies plus .gz/.br siblings, which
+# WhiteNoise serves with Content-Encoding and far-future Cache-Control
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "utils.storage.StaticFilesStorage",
+    },
+}
+# Fall back to the unhashed name instead of raising for files missing
+# from the manifest (e.g. before collectstatic has run)
+WHITENOISE_MANIFEST_STRICT = False
+# Unhashed files (favicon, files referenced by literal path)
+WHITENOISE_MAX_AGE = int(os.environ.get("WHITENOISE_MAX_AGE", 3600))
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Read admin patient list totals from patients.PatientStats instead of
+# aggregating bookings per request (for very large patient bases).
+# Populate it first with `manage.py rebuild_patient_stats`.
+ADMIN_PATIENT_STATS_CACHED = (
+    os.environ.get("ADMIN_PATIENT_STATS_CACHED", "False").lower() == "true"
+)
+
+# Per-request query count, SQL time and template time
+# (core.instrumentation). Requests with more queries, more repeated
+# queries (likely N+1) or a longer duration than these thresholds are
+# logged as JSON warnings; REQUEST_METRICS_LOG_ALL logs every request.
+# Per-view totals are served in Prometheus format at /monitoring/metrics/.
+REQUEST_METRICS = os.environ.get("REQUEST_METRICS", "True").lower() == "true"
+REQUEST_METRICS_LOG_ALL = (
+    os.environ.get("REQUEST_METRICS_LOG_ALL", "False").lower() == "true"
+)
+REQUEST_METRICS_QUERY_THRESHOLD = int(
+    os.environ.get("REQUEST_METRICS_QUERY_THRESHOLD", 30)
+)
+REQUEST_METRICS_DUPLICATE_THRESHOLD = int(
+    os.environ.get("REQUEST_METRICS_DUPLICATE_THRESHOLD", 5)
+)
+REQUEST_METRICS_SLOW_MS = int(os.environ.get("REQUEST_METRICS_SLOW_MS", 1000))
+
 # Logging
 LOGGING = {
     "version": 1,
@@ -23,6 +23,7 @@ DATABASES = {
         "PASSWORD": os.environ.get("POSTGRES_DEV_PASSWORD", ""),
         "HOST": os.environ.get("POSTGRES_DEV_HOST", "db"),
         "PORT": os.environ.get("POSTGRES_DEV_PORT", "5432"),
+        **DATABASE_CONNECTION,
     }
 }
 
@@ -0,0 +1,46 @@
+# test.py
+from .base import *  # noqa
+
+DEBUG = False
+SECRET_KEY = "test-unsafe-secret"
+
+ALLOWED_HOSTS = ["testserver"]
+
+# SQLite in memory unless a Postgres test server is configured; query
+# budgets are the same on both
+if os.environ.get("POSTGRES_TEST_HOST"):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("POSTGRES_TEST_DB", "RoydClinic_test"),
+            "USER": os.environ.get("POSTGRES_TEST_USER", "RoydClinic"),
+            "PASSWORD": os.environ.get("POSTGRES_TEST_PASSWORD", ""),
+            "HOST": os.environ["POSTGRES_TEST_HOST"],
+            "PORT": os.environ.get("POSTGRES_TEST_PORT", "5432"),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+        }
+    }
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# No collectstatic manifest in tests
+STORAGES = {
+    **STORAGES,
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+REQUEST_METRICS = False
@@ -50,9 +50,8 @@ urlpatterns = [
     ),
 ]
 
-# Add static and media URL patterns
+# Add media URL patterns (static files are served by WhiteNoise)
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
 # Add debug toolbar only in DEBUG mode
 if settings.DEBUG:
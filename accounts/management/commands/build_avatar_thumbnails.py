@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import Profile
+from doctors.cache import bump_profile_version
+from utils.images import InvalidImageError
+
+
+class Command(BaseCommand):
+    help = "Generate the resized WebP/JPEG variants of uploaded avatars"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate variants that already exist",
+        )
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.filter(avatar_exists=True).exclude(
+            avatar=Profile._meta.get_field("avatar").default
+        )
+        if not options["force"]:
+            profiles = profiles.filter(avatar_thumbnails=False)
+
+        built = failed = 0
+        for profile in profiles.only("id", "user_id", "avatar").iterator():
+            try:
+                profile.build_avatar_thumbnails()
+            except (InvalidImageError, OSError) as e:
+                failed += 1
+                self.stderr.write(f"{profile.avatar.name}: {e}")
+                continue
+            bump_profile_version(profile.user_id)
+            built += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Built thumbnails for {built} avatars ({failed} failed)"
+            )
+        )
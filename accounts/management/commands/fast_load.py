@@ -0,0 +1,169 @@
+import csv
+import json
+from pathlib import Path
+
+from django.core import serializers
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers.base import DeserializationError
+from django.db import DatabaseError, connection, transaction
+
+from accounts.models import Profile, User
+from doctors.facets import invalidate_facets
+from doctors.search import build_search_document
+
+MODELS = {"accounts.user": User, "accounts.profile": Profile}
+CSV_FILES = {"accounts.user": "users.csv", "accounts.profile": "profiles.csv"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk load users and profiles written by generate_database.py "
+        "(json, ndjson or a csv directory) without per-row saves or signals"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path)
+        parser.add_argument(
+            "--format",
+            choices=["json", "ndjson", "csv"],
+            help="Default: csv for a directory, ndjson for .jsonl/.ndjson",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+        input_format = options["format"] or (
+            "csv"
+            if path.is_dir()
+            else "ndjson"
+            if path.suffix in (".jsonl", ".ndjson")
+            else "json"
+        )
+        self.batch_size = options["batch_size"]
+        self.counts = {User: 0, Profile: 0}
+
+        records = {
+            "json": self.read_json,
+            "ndjson": self.read_ndjson,
+            "csv": self.read_csv,
+        }[input_format](path)
+
+        try:
+            with transaction.atomic():
+                self.load(serializers.deserialize("python", records))
+                missing = self.create_missing_profiles()
+                self.reset_sequences()
+        except (DatabaseError, DeserializationError) as e:
+            raise CommandError(f"Nothing was loaded: {e}")
+        # bulk_create skipped the receivers that keep the facet cache fresh
+        invalidate_facets()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Loaded {self.counts[User]} users and {self.counts[Profile]} "
+                f"profiles ({missing} default profiles created)"
+            )
+        )
+
+    # Readers: yield fixture-style {"model", "pk", "fields"} dicts
+
+    def read_json(self, path):
+        # A JSON array has to be parsed whole; prefer ndjson for big files
+        with open(path, encoding="utf-8") as f:
+            yield from self.check_models(json.load(f))
+
+    def read_ndjson(self, path):
+        with open(path, encoding="utf-8") as f:
+            yield from self.check_models(
+                json.loads(line) for line in f if line.strip()
+            )
+
+    def read_csv(self, path):
+        for label, filename in CSV_FILES.items():
+            model = MODELS[label]
+            # CSV cannot tell NULL or a missing value from "": empty
+            # nullable columns are NULL, other empty columns get the default
+            nullable = {field.name for field in model._meta.fields if field.null}
+            with open(path / filename, encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f):
+                    pk = row.pop("pk")
+                    fields = {}
+                    for name, value in row.items():
+                        if value != "":
+                            fields[name] = value
+                        elif name in nullable:
+                            fields[name] = None
+                    yield {"model": label, "pk": pk, "fields": fields}
+
+    def check_models(self, records):
+        for record in records:
+            if record["model"] not in MODELS:
+                raise CommandError(
+                    f"Unsupported model {record['model']!r}, only users and "
+                    "profiles can be fast loaded (use loaddata for the rest)"
+                )
+            yield record
+
+    # Writers
+
+    def load(self, objects):
+        users = []
+        profiles = []
+        for deserialized in objects:
+            obj = deserialized.object
+            if isinstance(obj, User):
+                users.append(obj)
+            else:
+                profiles.append(obj)
+            if len(users) >= self.batch_size or len(profiles) >= self.batch_size:
+                self.flush(users, profiles)
+                users, profiles = [], []
+        self.flush(users, profiles)
+
+    def flush(self, users, profiles):
+        # bulk_create sends no signals: the create_profile receiver would
+        # otherwise add a second profile per user, and the search document
+        # receiver would run once per row
+        if users:
+            User.objects.bulk_create(users)
+            self.counts[User] += len(users)
+        if profiles:
+            owners = User.objects.only("first_name", "last_name").in_bulk(
+                {profile.user_id for profile in profiles}
+            )
+            for profile in profiles:
+                owner = owners.get(profile.user_id)
+                if owner is not None:
+                    profile.search_document = build_search_document(
+                        owner, profile
+                    )
+            Profile.objects.bulk_create(profiles)
+            self.counts[Profile] += len(profiles)
+
+    def create_missing_profiles(self):
+        """What create_profile would have done for users without one."""
+        created = 0
+        users = User.objects.filter(profile__isnull=True).only(
+            "id", "first_name", "last_name"
+        )
+        batch = []
+        for user in users.iterator(chunk_size=self.batch_size):
+            profile = Profile(user=user)
+            profile.search_document = build_search_document(user, profile)
+            batch.append(profile)
+            if len(batch) == self.batch_size:
+                Profile.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        Profile.objects.bulk_create(batch)
+        return created + len(batch)
+
+    def reset_sequences(self):
+        # Explicit primary keys do not advance the PostgreSQL sequences
+        statements = connection.ops.sequence_reset_sql(no_style(), [User, Profile])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -0,0 +1,55 @@
+import posixpath
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import Profile
+from doctors.cache import bump_profile_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Check every profile avatar against the storage and update the "
+        "cached Profile.avatar_exists flags"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        storage = Profile._meta.get_field("avatar").storage
+        listings = {}
+
+        def exists(name):
+            # One listing per directory instead of one stat/HEAD per file
+            directory, filename = posixpath.split(name)
+            if directory not in listings:
+                try:
+                    listings[directory] = set(storage.listdir(directory)[1])
+                except (NotImplementedError, OSError):
+                    listings[directory] = None
+            files = listings[directory]
+            return filename in files if files is not None else storage.exists(name)
+
+        changed = []
+        profiles = Profile.objects.only(
+            "id", "user_id", "avatar", "avatar_exists"
+        )
+        for profile in profiles.iterator(chunk_size=options["batch_size"]):
+            found = bool(profile.avatar.name) and exists(profile.avatar.name)
+            if found != profile.avatar_exists:
+                profile.avatar_exists = found
+                changed.append(profile)
+
+        Profile.objects.bulk_update(
+            changed, ["avatar_exists"], batch_size=options["batch_size"]
+        )
+        # bulk_update skips the signals that expire cached doctor profiles
+        for profile in changed:
+            bump_profile_version(profile.user_id)
+
+        missing = Profile.objects.filter(avatar_exists=False).count()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated {len(changed)} profiles, {missing} avatars missing"
+            )
+        )
@@ -2,12 +2,12 @@ from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.urls import reverse
-from django.db.models import Avg
 
 from accounts.managers import CustomUserManager
 from utils.file_utils import (
     profile_photo_directory_path,
 )
+from utils.images import generate_avatar_variants
 
 
 class User(AbstractUser):
@@ -61,25 +61,20 @@ class User(AbstractUser):
 
     @property
     def rating(self):
-        """Calculate average rating from reviews"""
+        """Average review rating, from the profile's denormalized aggregate"""
         return self.average_rating
 
     @property
     def average_rating(self):
-        return (
-            self.reviews_received.aggregate(Avg("rating"))["rating__avg"] or 0
-        )
+        return self.profile.rating_average
 
     @property
     def rating_count(self):
-        return self.reviews_received.count()
+        return self.profile.rating_count
 
     @property
     def rating_distribution(self):
-        distribution = {i: 0 for i in range(1, 6)}
-        for rating in self.reviews_received.values_list("rating", flat=True):
-            distribution[rating] += 1
-        return distribution
+        return self.profile.rating_distribution
 
 
 class Profile(models.Model):
@@ -93,6 +88,13 @@ class Profile(models.Model):
     avatar = models.ImageField(
         default="defaults/user.png", upload_to=profile_photo_directory_path
     )
+    # Whether the avatar file is known to exist in storage, so rendering
+    # `image` needs no storage I/O. Set on upload, reconciled in bulk by
+    # `manage.py reconcile_avatars`.
+    avatar_exists = models.BooleanField(default=True, editable=False)
+    # Whether the resized WebP/JPEG variants of the current avatar exist
+    # (see utils.images and the avatar_url template tag)
+    avatar_thumbnails = models.BooleanField(default=False, editable=False)
     phone = models.CharField(max_length=20, blank=True, null=True)
     dob = models.DateField(blank=True, null=True)
     about = models.TextField(blank=True, null=True)
@@ -129,13 +131,53 @@ class Profile(models.Model):
     allergies = models.TextField(blank=True, null=True)
     medical_conditions = models.TextField(blank=True, null=True)
 
+    # Accent-folded text matched by doctors.search, maintained by
+    # doctors.signals
+    search_document = models.TextField(blank=True, default="", editable=False)
+
+    # Denormalized review aggregates, maintained by core.signals
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_average = models.FloatField(default=0, db_index=True)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return "Profile of {}".format(self.user.username)
 
+    def save(self, *args, **kwargs):
+        # A newly assigned upload is written to storage by this save
+        if self.avatar and not self.avatar._committed:
+            self.avatar_exists = True
+            self.avatar_thumbnails = False
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    "avatar_exists",
+                    "avatar_thumbnails",
+                }
+        super().save(*args, **kwargs)
+
+    def build_avatar_thumbnails(self):
+        """Write the resized variants of the stored avatar."""
+        generate_avatar_variants(self.avatar)
+        self.avatar_thumbnails = True
+        Profile.objects.filter(pk=self.pk).update(avatar_thumbnails=True)
+
     @property
     def image(self):
         return (
             self.avatar.url
-            if self.avatar.storage.exists(self.avatar.name)
+            if self.avatar and self.avatar_exists
             else "{}defaults/user.png".format(settings.MEDIA_URL)
         )
+
+    @property
+    def rating_distribution(self):
+        return {
+            i: getattr(self, "rating_{}_count".format(i)) for i in range(1, 6)
+        }
@@ -0,0 +1,54 @@
+from django.db import transaction
+
+from accounts.models import Profile, User
+from doctors.facets import invalidate_facets
+from doctors.search import build_search_document, fallback_index
+
+
+def register_user(user, password=None, **profile_fields):
+    """
+    Save a new ``user`` together with its populated Profile in one
+    transaction: one INSERT each, instead of the create_profile signal
+    inserting an empty profile that is then updated.
+
+    ``password`` is hashed when given (registration forms pass the raw
+    password).
+    """
+    if password is not None:
+        user.set_password(password)
+    profile = Profile(**profile_fields)
+    # A cached profile tells accounts.signals.create_profile to stand down
+    user.profile = profile
+    with transaction.atomic():
+        user.save()
+        profile.user = user
+        profile.save(force_insert=True)
+    return user
+
+
+def bulk_register_users(entries, batch_size=1000):
+    """
+    Insert many ``(user, profile_fields)`` pairs with one bulk INSERT per
+    table and batch. Passwords must already be hashed (``make_password``
+    once, not per user). Returns the created users.
+
+    bulk_create sends no signals, so the search documents are built here
+    and the search fallback index and the directory facets are invalidated
+    once at the end.
+    """
+    entries = list(entries)
+    created = []
+    with transaction.atomic():
+        for start in range(0, len(entries), batch_size):
+            batch = entries[start:start + batch_size]
+            users = User.objects.bulk_create([user for user, _ in batch])
+            profiles = []
+            for user, (_, profile_fields) in zip(users, batch):
+                profile = Profile(user=user, **profile_fields)
+                profile.search_document = build_search_document(user, profile)
+                profiles.append(profile)
+            Profile.objects.bulk_create(profiles)
+            created.extend(users)
+    fallback_index.invalidate()
+    invalidate_facets()
+    return created
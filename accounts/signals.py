@@ -5,6 +5,11 @@ from .models import User, Profile
 
 
 @receiver(post_save, sender=User)
-def create_profile(sender, instance, created, **kwargs):
-    if created:
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    # Fallback for users created outside accounts.services (createsuperuser,
+    # the admin, shell); register_user attaches its own profile first and
+    # fixtures (raw) carry their own profile records
+    if raw or not created:
+        return
+    if not User.profile.related.is_cached(instance):
         Profile.objects.create(user=instance)
@@ -0,0 +1,16 @@
+from accounts.models import Profile
+from core.jobs import task
+from doctors.cache import bump_profile_version
+
+
+@task
+def build_avatar_thumbnails(profile_id):
+    """Resize a freshly uploaded avatar off the request."""
+    profile = (
+        Profile.objects.filter(pk=profile_id).only("id", "user_id", "avatar").first()
+    )
+    if profile is None or not profile.avatar:
+        return
+    profile.build_avatar_thumbnails()
+    # Cached profile pages still point at the full-size upload
+    bump_profile_version(profile.user_id)
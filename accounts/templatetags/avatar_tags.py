@@ -0,0 +1,28 @@
+from django import template
+
+from utils.images import AVATAR_FORMATS, AVATAR_SIZES, avatar_variant_name
+
+register = template.Library()
+
+
+@register.simple_tag
+def avatar_url(profile, size="list", fmt="webp"):
+    """
+    URL of the ``size`` variant of a profile avatar, e.g.
+    ``{% avatar_url doctor.profile "dashboard" %}``.
+
+    Defaults to WebP; pass ``"jpeg"`` where WebP is not an option (print,
+    email). Falls back to ``profile.image`` when no variants exist yet.
+    No storage I/O either way.
+    """
+    if profile is None:
+        return ""
+    if size not in AVATAR_SIZES or fmt not in AVATAR_FORMATS:
+        raise template.TemplateSyntaxError(
+            f"Unknown avatar variant {size!r}/{fmt!r}"
+        )
+    if not (profile.avatar_thumbnails and profile.avatar_exists):
+        return profile.image
+    return profile.avatar.storage.url(
+        avatar_variant_name(profile.avatar.name, size, fmt)
+    )
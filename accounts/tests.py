@@ -0,0 +1,27 @@
+from django.urls import reverse
+
+# Query budgets: see doctors/tests.py
+
+
+def test_admin_dashboard_queries(query_budget, clinic):
+    query_budget(reverse("admin-dashboard"), 8, user=clinic.admin)
+
+
+def test_admin_patients_queries(query_budget, clinic):
+    query_budget(reverse("admin-patients"), 4, user=clinic.admin)
+
+
+def test_appointment_report_queries(query_budget, clinic):
+    query_budget(reverse("admin-appointment-report"), 5, user=clinic.admin)
+
+
+def test_revenue_report_queries(query_budget, clinic):
+    query_budget(reverse("admin-revenue-report"), 6, user=clinic.admin)
+
+
+def test_admin_appointments_queries(query_budget, clinic):
+    query_budget(reverse("admin-appointments"), 4, user=clinic.admin)
+
+
+def test_admin_reviews_queries(query_budget, clinic):
+    query_budget(reverse("admin-reviews"), 6, user=clinic.admin)
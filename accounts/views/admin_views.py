@@ -7,8 +7,9 @@ from datetime import date
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
-from django.db.models.functions import TruncMonth, TruncDay
-from django.db.models import Count, Sum, Q, F, Case, When, IntegerField
+from django.db.models.functions import Coalesce, TruncMonth
+from django.db.models import Count, Sum, Q, F, Case, When, IntegerField, Max, Value
+from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 from django.core.serializers.json import DjangoJSONEncoder
@@ -17,8 +18,10 @@ from decimal import Decimal
 
 from core.models import Review, Speciality
 from accounts.models import User
-from bookings.models import Booking, Prescription
+from bookings.models import Booking, DailyBookingStats, Prescription
 from doctors.models import doctors
+from utils.db import age_from_dob
+from utils.pagination import CursorPaginationMixin
 import patients
 
 
@@ -43,7 +46,7 @@ class AdminDashboardView(AdminRequiredMixin, TemplateView):
             Booking.objects.filter(
                 status='completed'
             ).aggregate(
-                total=Sum(F('doctor__profile__price_per_consultation'))
+                total=Sum('fee')
             )['total'] or 0
         )
 
@@ -52,31 +55,27 @@ class AdminDashboardView(AdminRequiredMixin, TemplateView):
             role='doctor'
         ).select_related('profile').annotate(
             earned=Sum(
-                F('profile__price_per_consultation'),
+                'appointments__fee',
                 filter=Q(appointments__status='completed')
             )
         ).order_by('-id')[:5]
     
         context['recent_doctors'] = doctors
 
-        # Get recent patients with their appointments efficiently
+        # Get recent patients with their stats in one query
         patients = User.objects.filter(
-                    role='patient'
-                ).select_related('profile').prefetch_related(
-                    'patient_appointments__doctor__profile'
-                )[:5]
-                
-        for patient in patients:
-                    appointments = patient.patient_appointments.all()
-                    patient.last_visit = (
-                        max(a.appointment_date for a in appointments) 
-                        if appointments else None
-                    )
-                    patient.total_paid = sum(
-                        a.doctor.profile.price_per_consultation or 0
-                        for a in appointments if a.status == 'completed'
-                    )        
-    
+            role='patient'
+        ).select_related('profile').annotate(
+            last_visit=Max('patient_appointments__appointment_date'),
+            total_paid=Coalesce(
+                Sum(
+                    'patient_appointments__fee',
+                    filter=Q(patient_appointments__status='completed')
+                ),
+                Value(Decimal(0)),
+            ),
+        ).order_by('-id')[:5]
+
         context['recent_patients'] = patients
 
         # Get recent appointments
@@ -99,49 +98,37 @@ class AdminPatientsView(AdminRequiredMixin, ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        queryset = User.objects.filter(role="patient").select_related("profile")
-
-        # Add computed fields for each patient
-        for patient in queryset:
-            # Get last visit date
-            latest_appointment = (
-                Booking.objects.filter(patient=patient)
-                .order_by("-appointment_date")
-                .first()
-            )
-            patient.last_visit = (
-                latest_appointment.appointment_date if latest_appointment else None
-            )
+        queryset = (
+            User.objects.filter(role="patient")
+            .select_related("profile")
+            .annotate(age=age_from_dob("profile__dob"))
+            .order_by("-id")
+        )
 
-            # Calculate total amount paid
-            patient.total_paid = (
-                Booking.objects.filter(patient=patient, status="completed").aggregate(
-                    total=Sum("doctor__profile__price_per_consultation")
-                )["total"]
-                or 0
+        if settings.ADMIN_PATIENT_STATS_CACHED:
+            return queryset.annotate(
+                last_visit=F("stats__last_visit"),
+                total_paid=Coalesce(F("stats__total_paid"), Value(Decimal(0))),
+                total_appointments=Coalesce(
+                    F("stats__total_appointments"), Value(0)
+                ),
+                completed_appointments=Coalesce(
+                    F("stats__completed_appointments"), Value(0)
+                ),
             )
 
-            # Calculate age from DOB if available
-            if patient.profile.dob:
-                today = date.today()
-                patient.profile.age = (
-                    today.year
-                    - patient.profile.dob.year
-                    - (
-                        (today.month, today.day)
-                        < (patient.profile.dob.month, patient.profile.dob.day)
-                    )
-                )
-            else:
-                patient.profile.age = None
-
-            # Get appointment stats
-            patient.total_appointments = Booking.objects.filter(patient=patient).count()
-            patient.completed_appointments = Booking.objects.filter(
-                patient=patient, status="completed"
-            ).count()
-
-        return queryset
+        completed = Q(patient_appointments__status="completed")
+        return queryset.annotate(
+            last_visit=Max("patient_appointments__appointment_date"),
+            total_paid=Coalesce(
+                Sum("patient_appointments__fee", filter=completed),
+                Value(Decimal(0)),
+            ),
+            total_appointments=Count("patient_appointments"),
+            completed_appointments=Count(
+                "patient_appointments", filter=completed
+            ),
+        )
 
 
 class AdminDoctorsView(AdminRequiredMixin, ListView):
@@ -154,16 +141,18 @@ class AdminDoctorsView(AdminRequiredMixin, ListView):
         return User.objects.filter(role="doctor")
 
 
-class AdminAppointmentsView(AdminRequiredMixin, ListView):
+class AdminAppointmentsView(AdminRequiredMixin, CursorPaginationMixin, ListView):
     model = Booking
     template_name = "dashboard/appointments.html"
     context_object_name = "appointments"
     paginate_by = 10
+    ordering = ("-appointment_date", "-appointment_time", "id")
+    estimate_count = True
 
     def get_queryset(self):
         return Booking.objects.select_related(
             "doctor", "doctor__profile", "patient", "patient__profile"
-        ).order_by("-appointment_date", "-appointment_time")
+        )
 
 
 class AdminSpecialitiesView(AdminRequiredMixin, ListView):
@@ -207,11 +196,13 @@ class SpecialityDeleteView(AdminRequiredMixin, DeleteView):
         return super().delete(request, *args, **kwargs)
 
 
-class AdminPrescriptionsView(AdminRequiredMixin, ListView):
+class AdminPrescriptionsView(AdminRequiredMixin, CursorPaginationMixin, ListView):
     model = Prescription
     template_name = "dashboard/prescriptions.html"
     context_object_name = "prescriptions"
     paginate_by = 10
+    ordering = ("-created_at", "-id")
+    estimate_count = True
 
     def get_queryset(self):
         return Prescription.objects.select_related(
@@ -220,7 +211,7 @@ class AdminPrescriptionsView(AdminRequiredMixin, ListView):
             "patient",
             "patient__profile",
             "booking",
-        ).order_by("-created_at")
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -232,11 +223,13 @@ class AdminPrescriptionsView(AdminRequiredMixin, ListView):
         return context
 
 
-class AdminReviewListView(AdminRequiredMixin, ListView):
+class AdminReviewListView(AdminRequiredMixin, CursorPaginationMixin, ListView):
     model = Review
     template_name = "dashboard/reviews.html"
     context_object_name = "reviews"
     paginate_by = 10
+    ordering = ("-created_at", "-id")
+    estimate_count = True
 
     def get_queryset(self):
         return Review.objects.select_related(
@@ -245,7 +238,7 @@ class AdminReviewListView(AdminRequiredMixin, ListView):
             "patient",
             "patient__profile",
             "booking",
-        ).order_by("-created_at")
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -256,29 +249,54 @@ class AdminReviewListView(AdminRequiredMixin, ListView):
         return context
 
 
-class AppointmentReportView(AdminRequiredMixin, TemplateView):
-    template_name = "dashboard/reports/appointments.html"
+class ReportDateRangeMixin:
+    """
+    Read the report window from ``?start=YYYY-MM-DD&end=YYYY-MM-DD``,
+    defaulting to the last ``default_days`` days.
+    """
+
+    default_days = 30
+
+    def get_date_range(self):
+        end_date = timezone.now().date()
+        start_date = end_date - timedelta(days=self.default_days)
+        try:
+            if self.request.GET.get("end"):
+                end_date = date.fromisoformat(self.request.GET["end"])
+            if self.request.GET.get("start"):
+                start_date = date.fromisoformat(self.request.GET["start"])
+        except ValueError:
+            messages.error(self.request, "Invalid date range")
+        if start_date > end_date:
+            start_date, end_date = end_date, start_date
+        return start_date, end_date
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        self.start_date, self.end_date = self.get_date_range()
+        context.update({"start_date": self.start_date, "end_date": self.end_date})
+        return context
 
-        # Get date range from query params or default to last 30 days
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=30)
 
-        # Get appointments data
-        appointments = Booking.objects.filter(
-            appointment_date__range=[start_date, end_date]
-        ).select_related("doctor", "patient")
+class AppointmentReportView(AdminRequiredMixin, ReportDateRangeMixin, TemplateView):
+    template_name = "dashboard/reports/appointments.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        # ✅ Read the daily rollup instead of scanning bookings
+        stats = DailyBookingStats.objects.filter(
+            date__range=[self.start_date, self.end_date]
+        )
 
         # Monthly trend
         monthly_stats = list(
-            appointments.annotate(month=TruncMonth("appointment_date"))
+            stats.annotate(month=TruncMonth("date"))
             .values("month")
             .annotate(
-                total=Count("id"),
-                completed=Count("id", filter=Q(status="completed")),
-                cancelled=Count("id", filter=Q(status="cancelled")),
+                total=Sum("total"),
+                completed=Sum("completed"),
+                cancelled=Sum("cancelled"),
             )
             .order_by("month")
         )
@@ -287,16 +305,26 @@ class AppointmentReportView(AdminRequiredMixin, TemplateView):
         for stat in monthly_stats:
             stat["month"] = stat["month"].strftime("%Y-%m-%d")
 
-        # Status distribution
-        status_stats = list(appointments.values("status").annotate(count=Count("id")))
+        # Totals and status distribution
+        totals = stats.aggregate(
+            total=Sum("total"),
+            **{status: Sum(status) for status in DailyBookingStats.STATUS_FIELDS},
+        )
+        status_stats = [
+            {"status": status, "count": totals[status]}
+            for status in DailyBookingStats.STATUS_FIELDS
+            if totals[status]
+        ]
 
         # Doctor performance
         doctor_stats = list(
-            appointments.values("doctor__first_name", "doctor__last_name").annotate(
-                total=Count("id"),
-                completed=Count("id", filter=Q(status="completed")),
-                cancelled=Count("id", filter=Q(status="cancelled")),
+            stats.values("doctor__first_name", "doctor__last_name")
+            .annotate(
+                total=Sum("total"),
+                completed=Sum("completed"),
+                cancelled=Sum("cancelled"),
             )
+            .order_by("-total")
         )
 
         context.update(
@@ -304,37 +332,30 @@ class AppointmentReportView(AdminRequiredMixin, TemplateView):
                 "monthly_stats": json.dumps(monthly_stats),
                 "status_stats": json.dumps(status_stats),
                 "doctor_stats": doctor_stats,
-                "total_appointments": appointments.count(),
-                "completed_appointments": appointments.filter(
-                    status="completed"
-                ).count(),
-                "cancelled_appointments": appointments.filter(
-                    status="cancelled"
-                ).count(),
+                "total_appointments": totals["total"] or 0,
+                "completed_appointments": totals["completed"] or 0,
+                "cancelled_appointments": totals["cancelled"] or 0,
             }
         )
         return context
 
 
-class RevenueReportView(AdminRequiredMixin, TemplateView):
+class RevenueReportView(AdminRequiredMixin, ReportDateRangeMixin, TemplateView):
     template_name = "dashboard/reports/revenue.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Add date filtering
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=30)
-
-        completed_bookings = Booking.objects.filter(status="completed").select_related(
-            "doctor__profile"
+        # ✅ Read the daily rollup of the selected range only
+        stats = DailyBookingStats.objects.filter(
+            date__range=[self.start_date, self.end_date], completed__gt=0
         )
 
         # Monthly revenue
         monthly_revenue = list(
-            completed_bookings.annotate(month=TruncMonth("appointment_date"))
+            stats.annotate(month=TruncMonth("date"))
             .values("month")
-            .annotate(revenue=Sum("doctor__profile__price_per_consultation"))
+            .annotate(revenue=Sum("revenue"))
             .order_by("month")
         )
 
@@ -345,10 +366,10 @@ class RevenueReportView(AdminRequiredMixin, TemplateView):
 
         # Doctor revenue
         doctor_revenue = list(
-            completed_bookings.values("doctor__first_name", "doctor__last_name")
+            stats.values("doctor__first_name", "doctor__last_name")
             .annotate(
-                revenue=Sum("doctor__profile__price_per_consultation"),
-                appointments=Count("id"),
+                revenue=Sum("revenue"),
+                appointments=Sum("completed"),
             )
             .order_by("-revenue")
         )
@@ -357,30 +378,29 @@ class RevenueReportView(AdminRequiredMixin, TemplateView):
         for stat in doctor_revenue:
             stat["revenue"] = float(stat["revenue"]) if stat["revenue"] else 0
 
+        totals = stats.aggregate(
+            total_revenue=Sum("revenue"), total_appointments=Sum("completed")
+        )
+        total_revenue = totals["total_revenue"] or 0
+        total_appointments = totals["total_appointments"] or 0
+
         # Add summary statistics
         context.update(
             {
-                "total_appointments": completed_bookings.count(),
+                "total_appointments": total_appointments,
                 "average_revenue_per_appointment": (
-                    completed_bookings.aggregate(
-                        avg=Avg("doctor__profile__price_per_consultation")
-                    )["avg"]
-                    or 0
+                    total_revenue / total_appointments
+                    if total_appointments
+                    else 0
                 ),
-                "highest_revenue_day": completed_bookings.annotate(
-                    day=TruncDay("appointment_date")
-                )
-                .values("day")
-                .annotate(total=Sum("doctor__profile__price_per_consultation"))
+                "highest_revenue_day": stats.values(day=F("date"))
+                .annotate(total=Sum("revenue"))
                 .order_by("-total")
                 .first(),
                 "monthly_revenue_stats": json.dumps(monthly_revenue),
                 "monthly_revenue": monthly_revenue,
                 "doctor_revenue": doctor_revenue,
-                "total_revenue": completed_bookings.aggregate(
-                    total=Sum("doctor__profile__price_per_consultation")
-                )["total"]
-                or 0,
+                "total_revenue": total_revenue,
             }
         )
 
@@ -12,8 +12,11 @@ from accounts.forms import (
     UserLoginForm,
 )
 from accounts.models import User
+from accounts.tasks import build_avatar_thumbnails
 from accounts.serializers import BasicUserInformationSerializer
+from accounts.services import register_user
 from utils.htmx import render_toast_message_for_api
+from utils.images import InvalidImageError, sanitize_avatar
 from django.db import transaction
 from django.core.exceptions import ValidationError
 
@@ -36,10 +39,11 @@ class RegisterDoctorView(CreateView):
         form = self.form_class(data=request.POST)
 
         if form.is_valid():
-            user = form.save(commit=False)
-            password = form.cleaned_data.get("password1")
-            user.set_password(password)
-            user.save()
+            # ✅ User + Profile in one transaction, one INSERT each
+            register_user(
+                form.save(commit=False),
+                password=form.cleaned_data.get("password1"),
+            )
             return redirect("accounts:login")
         else:
             return render(request, "accounts/register.html", {"form": form})
@@ -62,10 +66,11 @@ class RegisterPatientView(CreateView):
         form = self.form_class(data=request.POST)
 
         if form.is_valid():
-            user = form.save(commit=False)
-            password = form.cleaned_data.get("password1")
-            user.set_password(password)
-            user.save()
+            # ✅ User + Profile in one transaction, one INSERT each
+            register_user(
+                form.save(commit=False),
+                password=form.cleaned_data.get("password1"),
+            )
             return redirect("accounts:login")
         else:
             return render(request, "accounts/register.html", {"form": form})
@@ -196,10 +201,21 @@ class UpdateBasicUserInformationAPIView(LoginRequiredMixin, UpdateAPIView):
                         return render_toast_message_for_api(
                             "Error", "Only JPEG, PNG, GIF, and WebP images are allowed", "error"
                         )
-                    user_profile.avatar = files["avatar"]
+                    # Store a re-encoded copy without EXIF metadata
+                    try:
+                        user_profile.avatar = sanitize_avatar(files["avatar"])
+                    except InvalidImageError as e:
+                        transaction.savepoint_rollback(sid)
+                        return render_toast_message_for_api(
+                            "Error", str(e), "error"
+                        )
 
                 user_profile.full_clean()  # Validate model
                 user_profile.save()
+
+                # Resized WebP/JPEG variants served to listings
+                if "avatar" in files:
+                    build_avatar_thumbnails.defer(profile_id=user_profile.pk)
                 
                 transaction.savepoint_commit(sid)
 
@@ -1,4 +1,19 @@
 from django.contrib import admin
-from .models import Booking
+from .models import Booking, DailyBookingStats, SlotHold
 
 admin.site.register(Booking)
+
+
+@admin.register(DailyBookingStats)
+class DailyBookingStatsAdmin(admin.ModelAdmin):
+    list_display = ("doctor", "date", "total", "completed", "cancelled", "revenue")
+    list_filter = ("date",)
+    list_select_related = ("doctor",)
+    raw_id_fields = ("doctor",)
+
+
+@admin.register(SlotHold)
+class SlotHoldAdmin(admin.ModelAdmin):
+    list_display = ("doctor", "patient", "appointment_date", "appointment_time", "expires_at")
+    list_select_related = ("doctor", "patient")
+    raw_id_fields = ("doctor", "patient")
@@ -0,0 +1,124 @@
+from collections import defaultdict
+from datetime import time, timedelta
+from functools import lru_cache
+
+from django.utils import timezone
+
+from .holds import active_holds
+from .models import ACTIVE_BOOKING_STATUSES
+
+# Limit to prevent excessive slots for a single time range
+MAX_SLOTS_PER_RANGE = 50
+
+
+@lru_cache(maxsize=24 * 60)
+def _slot_for_minute(minute):
+    """Return the (time, formatted_time) pair for a minute of the day."""
+    slot_time = time(minute // 60, minute % 60)
+    return slot_time, slot_time.strftime("%I:%M %p")
+
+
+def _to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def get_range_minutes(time_range):
+    """Return the slot start offsets (minutes from midnight) of a range."""
+    step = time_range.get_slot_duration()
+    start = _to_minutes(time_range.start)
+    end = _to_minutes(time_range.end)
+    return range(start, end, step)[:MAX_SLOTS_PER_RANGE]
+
+
+def build_weekly_grid(doctor):
+    """
+    Materialize the doctor's weekly slot grid.
+
+    Returns a tuple of seven sorted tuples of minute offsets, indexed by
+    ``date.weekday()`` (the same numbering as ``WeeklyAvailability.weekday``).
+    Reads ``doctor.weekly_availability``, so prefetching it keeps this free
+    of extra queries; otherwise it costs a single query.
+    """
+    grid = [set() for _ in range(7)]
+    for time_range in doctor.weekly_availability.all():
+        grid[time_range.weekday].update(get_range_minutes(time_range))
+    return tuple(tuple(sorted(minutes)) for minutes in grid)
+
+
+class AvailabilityEngine:
+    """
+    Answer "free slots for a date range" for one doctor.
+
+    The weekly grid is built once per engine; booked and held slots for the
+    whole range are fetched with a single query. ``patient``'s own hold
+    does not hide their slot from them.
+    """
+
+    def __init__(self, doctor, patient=None):
+        self.doctor = doctor
+        self.patient = patient
+        self.grid = build_weekly_grid(doctor)
+
+    def has_schedule(self, date):
+        return bool(self.grid[date.weekday()])
+
+    def is_scheduled(self, date, slot_time):
+        """Whether ``slot_time`` is one of the doctor's slots on ``date``."""
+        if slot_time.second or slot_time.microsecond:
+            return False
+        return _to_minutes(slot_time) in self.grid[date.weekday()]
+
+    def get_booked_times(self, start_date, end_date):
+        """
+        Return ``{date: {time, ...}}`` of active bookings and other
+        patients' unexpired holds in the range.
+        """
+        booked = defaultdict(set)
+        bookings = self.doctor.appointments.filter(
+            appointment_date__range=(start_date, end_date),
+            status__in=ACTIVE_BOOKING_STATUSES,
+        )
+        holds = active_holds().filter(
+            doctor=self.doctor,
+            appointment_date__range=(start_date, end_date),
+        )
+        if self.patient is not None:
+            holds = holds.exclude(patient=self.patient)
+        fields = ("appointment_date", "appointment_time")
+        rows = (
+            bookings.order_by()
+            .values_list(*fields)
+            .union(holds.order_by().values_list(*fields), all=True)
+        )
+        for appointment_date, appointment_time in rows:
+            booked[appointment_date].add(appointment_time)
+        return booked
+
+    def get_free_slots(self, start_date, days=7, now=None):
+        """
+        Return ``{date: [{"time", "formatted_time"}, ...]}`` for ``days``
+        consecutive dates starting at ``start_date``.
+        """
+        now = now or timezone.localtime()
+        end_date = start_date + timedelta(days=days - 1)
+        booked = self.get_booked_times(start_date, end_date)
+        # Slots starting before "now" (to the second) are in the past
+        now_minute = _to_minutes(now) + bool(now.second or now.microsecond)
+
+        schedule = {}
+        for offset in range(days):
+            date = start_date + timedelta(days=offset)
+            booked_times = booked.get(date, ())
+            skip_before = now_minute if date == now.date() else -1
+            slots = []
+            for minute in self.grid[date.weekday()]:
+                if minute < skip_before:
+                    continue
+                slot_time, formatted_time = _slot_for_minute(minute)
+                if slot_time in booked_times:
+                    continue
+                slots.append(
+                    {"time": slot_time, "formatted_time": formatted_time}
+                )
+            schedule[date] = slots
+        return schedule
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ACTIVE_BOOKING_STATUSES, Booking, SlotHold
+
+
+def active_holds(now=None):
+    return SlotHold.objects.filter(expires_at__gt=now or timezone.now())
+
+
+def hold_slot(doctor, patient, appointment_date, appointment_time, now=None):
+    """
+    Reserve a slot for ``patient`` for SLOT_HOLD_TTL seconds, releasing
+    their previous hold. Returns the hold, or None when the slot is booked
+    or held by someone else.
+
+    Expiry needs no cron: an expired hold on the slot is deleted right
+    here, and the one-hold-per-patient constraint bounds the table.
+    """
+    now = now or timezone.now()
+    if Booking.objects.filter(
+        doctor=doctor,
+        appointment_date=appointment_date,
+        appointment_time=appointment_time,
+        status__in=ACTIVE_BOOKING_STATUSES,
+    ).exists():
+        return None
+    try:
+        with transaction.atomic():
+            SlotHold.objects.filter(
+                Q(patient=patient)
+                | Q(
+                    doctor=doctor,
+                    appointment_date=appointment_date,
+                    appointment_time=appointment_time,
+                    expires_at__lte=now,
+                )
+            ).delete()
+            # The unique constraint settles concurrent holds on one slot
+            return SlotHold.objects.create(
+                doctor=doctor,
+                patient=patient,
+                appointment_date=appointment_date,
+                appointment_time=appointment_time,
+                expires_at=now + timedelta(seconds=settings.SLOT_HOLD_TTL),
+            )
+    except IntegrityError:
+        return None
+
+
+def is_held_by_other(doctor, patient, appointment_date, appointment_time):
+    return (
+        active_holds()
+        .filter(
+            doctor=doctor,
+            appointment_date=appointment_date,
+            appointment_time=appointment_time,
+        )
+        .exclude(patient=patient)
+        .exists()
+    )
+
+
+def release_hold(patient):
+    SlotHold.objects.filter(patient=patient).delete()
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from accounts.models import Profile
+from bookings.models import Booking, DailyBookingStats
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill Booking.fee from the doctor's current consultation price for "
+        "bookings created before the fee was captured"
+    )
+
+    def handle(self, *args, **options):
+        price = Profile.objects.filter(user_id=OuterRef("doctor_id")).values(
+            "price_per_consultation"
+        )[:1]
+
+        with transaction.atomic():
+            # Single UPDATE ... SET fee = (SELECT ...); skips post_save
+            updated = Booking.objects.filter(fee__isnull=True).update(
+                fee=Subquery(price)
+            )
+            DailyBookingStats.rebuild()
+
+        if settings.ADMIN_PATIENT_STATS_CACHED:
+            call_command("rebuild_patient_stats", stdout=self.stdout)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Backfilled the fee of {updated} bookings")
+        )
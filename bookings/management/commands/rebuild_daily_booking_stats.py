@@ -0,0 +1,32 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from bookings.models import DailyBookingStats
+
+
+class Command(BaseCommand):
+    help = "Backfill or rebuild the daily booking stats used by the admin reports"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            help="First appointment date to rebuild (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--end",
+            type=date.fromisoformat,
+            help="Last appointment date to rebuild (YYYY-MM-DD)",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = DailyBookingStats.rebuild(
+            start_date=options["start"],
+            end_date=options["end"],
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {total} daily booking stats rows")
+        )
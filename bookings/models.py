@@ -1,8 +1,16 @@
-from django.db import models
+from functools import reduce
+from operator import or_
+
+from django.db import models, transaction
+from django.db.models import Count, Q, Sum
 from django.conf import settings
 from django_prose_editor.fields import ProseEditorField
 
 
+# Bookings that hold their slot; cancelled, completed and no-show ones free it
+ACTIVE_BOOKING_STATUSES = ("pending", "confirmed")
+
+
 class Booking(models.Model):
     doctor = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -33,19 +41,85 @@ class Booking(models.Model):
         default="pending",
         db_index=True,  # ✅ ADD INDEX
     )
+    # Consultation price at booking time; revenue is summed from this column
+    # so it stays correct when the doctor changes their price later
+    fee = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
 
     class Meta:
         ordering = ["-appointment_date", "-appointment_time"]
-        unique_together = ["doctor", "appointment_date", "appointment_time"]
         indexes = [  # ✅ ADD COMPOSITE INDEXES
             models.Index(fields=["doctor", "appointment_date"]),
             models.Index(fields=["patient", "appointment_date"]),
             models.Index(fields=["status", "appointment_date"]),
         ]
+        # ✅ Only active bookings hold a slot, so a cancelled one can be
+        # rebooked. The database enforces this; inserts need no locks
+        constraints = [
+            models.UniqueConstraint(
+                fields=["doctor", "appointment_date", "appointment_time"],
+                condition=Q(status__in=ACTIVE_BOOKING_STATUSES),
+                name="unique_active_doctor_slot",
+            ),
+            models.UniqueConstraint(
+                fields=["patient", "appointment_date", "appointment_time"],
+                condition=Q(status__in=ACTIVE_BOOKING_STATUSES),
+                name="unique_active_patient_slot",
+            ),
+        ]
 
     def __str__(self):
         return f"Appointment with Dr. {self.doctor.get_full_name()} on {self.appointment_date} at {self.appointment_time}"
 
+    @staticmethod
+    def is_patient_conflict(error):
+        """
+        Whether an IntegrityError from inserting a booking came from the
+        patient's side (they are busy then) rather than the doctor's slot.
+        PostgreSQL names the constraint, SQLite the columns.
+        """
+        cause = error.__cause__
+        constraint = getattr(getattr(cause, "diag", None), "constraint_name", None)
+        if constraint:
+            return constraint == "unique_active_patient_slot"
+        return "patient" in str(error)
+
+
+class SlotHold(models.Model):
+    """
+    A short reservation of a doctor's slot while a patient checks out (see
+    bookings.holds). Expired rows are ignored by every query and replaced
+    lazily, so nothing has to sweep them.
+    """
+
+    doctor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="slot_holds",
+    )
+    # One hold per patient: holding another slot releases the previous one
+    patient = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="slot_hold",
+    )
+    appointment_date = models.DateField()
+    appointment_time = models.TimeField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["doctor", "appointment_date", "appointment_time"],
+                name="unique_slot_hold",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.patient} holds Dr. {self.doctor} on {self.appointment_date} at {self.appointment_time}"
+
+
 class Prescription(models.Model):
     booking = models.OneToOneField(
         "Booking", on_delete=models.CASCADE, related_name="prescription"
@@ -83,3 +157,128 @@ class Prescription(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+
+
+class DailyBookingStats(models.Model):
+    """
+    Per doctor and appointment date booking rollup read by the admin
+    reports, so report cost depends on the selected date range rather than
+    the whole booking history.
+
+    Kept current by bookings.signals and rebuilt by
+    ``rebuild_daily_booking_stats``.
+    """
+
+    STATUS_FIELDS = ("pending", "confirmed", "completed", "cancelled", "no_show")
+
+    doctor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_booking_stats",
+    )
+    date = models.DateField(db_index=True)
+    total = models.PositiveIntegerField(default=0)
+    pending = models.PositiveIntegerField(default=0)
+    confirmed = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+    no_show = models.PositiveIntegerField(default=0)
+    # Revenue of the completed bookings
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Daily booking stats"
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["doctor", "date"], name="unique_daily_booking_stats"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Stats of Dr. {self.doctor} on {self.date}"
+
+    @classmethod
+    def aggregate_bookings(cls, bookings):
+        """Group ``bookings`` into unsaved rows, one per doctor and date."""
+        rows = (
+            bookings.values("doctor_id", "appointment_date")
+            .annotate(
+                total=Count("id"),
+                revenue=Sum("fee", filter=Q(status="completed")),
+                **{
+                    status: Count("id", filter=Q(status=status))
+                    for status in cls.STATUS_FIELDS
+                },
+            )
+            .order_by()
+        )
+        return [
+            cls(
+                doctor_id=row.pop("doctor_id"),
+                date=row.pop("appointment_date"),
+                revenue=row.pop("revenue") or 0,
+                **row,
+            )
+            for row in rows
+        ]
+
+    @classmethod
+    @transaction.atomic
+    def refresh(cls, keys):
+        """
+        Recompute the rows of ``keys`` ((doctor_id, date) pairs) with one
+        grouped query; rows left without bookings are deleted.
+        """
+        keys = set(keys)
+        if not keys:
+            return
+        stats = cls.aggregate_bookings(
+            Booking.objects.filter(
+                reduce(
+                    or_,
+                    (
+                        Q(doctor_id=doctor_id, appointment_date=date)
+                        for doctor_id, date in keys
+                    ),
+                )
+            )
+        )
+        cls.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=["doctor", "date"],
+            update_fields=["total", *cls.STATUS_FIELDS, "revenue", "updated_at"],
+        )
+
+        empty = keys - {(row.doctor_id, row.date) for row in stats}
+        if empty:
+            cls.objects.filter(
+                reduce(
+                    or_,
+                    (Q(doctor_id=doctor_id, date=date) for doctor_id, date in empty),
+                )
+            ).delete()
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls, start_date=None, end_date=None, batch_size=1000):
+        """
+        Recompute every row between ``start_date`` and ``end_date``
+        (inclusive, open-ended when ``None``). Returns the number of rows.
+        """
+        bookings = Booking.objects.all()
+        stats = cls.objects.all()
+        if start_date:
+            bookings = bookings.filter(appointment_date__gte=start_date)
+            stats = stats.filter(date__gte=start_date)
+        if end_date:
+            bookings = bookings.filter(appointment_date__lte=end_date)
+            stats = stats.filter(date__lte=end_date)
+
+        stats.delete()
+        rows = cls.objects.bulk_create(
+            cls.aggregate_bookings(bookings), batch_size=batch_size
+        )
+        return len(rows)
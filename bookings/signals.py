@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from bookings.models import Booking
+from bookings.tasks import refresh_daily_booking_stats as refresh_stats_task
+
+
+def _stats_key(booking):
+    return booking.doctor_id, booking.appointment_date
+
+
+def _defer_stats_refresh(keys):
+    # The rollup runs in a worker; a burst of bookings for the same doctor
+    # and day shares one queued refresh
+    for doctor_id, date in set(keys):
+        date_iso = str(date)
+        refresh_stats_task.defer(
+            doctor_id=doctor_id,
+            date_iso=date_iso,
+            unique_key=f"daily-booking-stats:{doctor_id}:{date_iso}",
+        )
+
+
+@receiver(pre_save, sender=Booking)
+def remember_previous_stats_bucket(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        instance._previous_stats = None
+        return
+    instance._previous_stats = (
+        Booking.objects.filter(pk=instance.pk)
+        .values_list("doctor_id", "appointment_date", "status")
+        .first()
+    )
+
+
+@receiver(post_save, sender=Booking)
+def refresh_daily_booking_stats(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_stats", None)
+    key = _stats_key(instance)
+    if previous is None:
+        _defer_stats_refresh([key])
+    elif previous != (*key, instance.status):
+        # Status, date or doctor changed: both buckets may be affected
+        _defer_stats_refresh([key, previous[:2]])
+
+
+@receiver(post_delete, sender=Booking)
+def refresh_daily_booking_stats_on_delete(sender, instance, **kwargs):
+    _defer_stats_refresh([_stats_key(instance)])
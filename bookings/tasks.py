@@ -0,0 +1,9 @@
+from datetime import date
+
+from bookings.models import DailyBookingStats
+from core.jobs import task
+
+
+@task
+def refresh_daily_booking_stats(doctor_id, date_iso):
+    DailyBookingStats.refresh([(doctor_id, date.fromisoformat(date_iso))])
@@ -1,3 +1,233 @@
-from django.test import TestCase
+import json
+from datetime import date, time, timedelta
 
-# Create your tests here.
+import pytest
+from django.contrib.messages import get_messages
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.availability import AvailabilityEngine
+from bookings.holds import hold_slot
+from bookings.models import ACTIVE_BOOKING_STATUSES, Booking, SlotHold
+from core.factories import (
+    BookingFactory,
+    DoctorFactory,
+    PatientFactory,
+    WeeklyAvailabilityFactory,
+)
+from doctors.models import WeeklyAvailability
+
+SLOT_DATE = date.today() + timedelta(days=1)
+SLOT_TIME = time(9)
+
+# Query budgets: see doctors/tests.py
+
+
+def test_booking_page_queries(query_budget, clinic):
+    query_budget(
+        reverse("bookings:doctor-booking-view", args=[clinic.doctor.username]),
+        5,
+        user=clinic.patient,
+    )
+
+
+# Booking slots (partial unique constraints on active bookings)
+
+
+def scheduled_doctor():
+    doctor = DoctorFactory()
+    for weekday in WeeklyAvailability.Weekday.values:
+        WeeklyAvailabilityFactory(doctor=doctor, weekday=weekday)
+    return doctor
+
+
+@pytest.fixture
+def doctor(db):
+    return scheduled_doctor()
+
+
+def slot_data(appointment_date=SLOT_DATE, appointment_time=SLOT_TIME):
+    return {
+        "selected_date": appointment_date.isoformat(),
+        "selected_time": appointment_time.strftime("%H:%M"),
+    }
+
+
+def book(client, patient, doctor):
+    client.force_login(patient)
+    response = client.post(
+        reverse("bookings:create-booking", args=[doctor.username]), slot_data()
+    )
+    return response, [str(m) for m in get_messages(response.wsgi_request)]
+
+
+def active_bookings(**filters):
+    return Booking.objects.filter(status__in=ACTIVE_BOOKING_STATUSES, **filters)
+
+
+def test_booking_a_free_slot(client, doctor):
+    response, _ = book(client, PatientFactory(), doctor)
+
+    booking = Booking.objects.get(doctor=doctor)
+    assert response.url == reverse("bookings:booking-success", args=[booking.id])
+    assert booking.status == "pending"
+
+
+def test_a_slot_cannot_be_booked_twice(client, doctor):
+    book(client, PatientFactory(), doctor)
+    response, messages = book(client, PatientFactory(), doctor)
+
+    assert response.url == reverse(
+        "bookings:doctor-booking-view", args=[doctor.username]
+    )
+    assert messages[-1] == "This time slot was just booked. Please choose another"
+    assert active_bookings(doctor=doctor).count() == 1
+
+
+def test_a_patient_cannot_be_in_two_places_at_once(client, doctor):
+    patient = PatientFactory()
+    other_doctor = scheduled_doctor()
+    book(client, patient, doctor)
+    response, messages = book(client, patient, other_doctor)
+
+    assert messages[-1] == "You already have an appointment at this time"
+    assert active_bookings(patient=patient).count() == 1
+
+
+def test_a_cancelled_slot_can_be_booked_again(client, doctor):
+    BookingFactory(
+        doctor=doctor,
+        appointment_date=SLOT_DATE,
+        appointment_time=SLOT_TIME,
+        status="cancelled",
+    )
+    response, _ = book(client, PatientFactory(), doctor)
+
+    booking = active_bookings(doctor=doctor).get()
+    assert response.url == reverse("bookings:booking-success", args=[booking.id])
+    assert Booking.objects.filter(doctor=doctor).count() == 2
+
+
+@pytest.mark.parametrize("status", ["pending", "confirmed"])
+def test_constraints_reject_a_second_active_booking(doctor, status):
+    BookingFactory(
+        doctor=doctor,
+        appointment_date=SLOT_DATE,
+        appointment_time=SLOT_TIME,
+        status=status,
+    )
+    with pytest.raises(IntegrityError) as doctor_conflict:
+        with transaction.atomic():
+            BookingFactory(
+                doctor=doctor,
+                appointment_date=SLOT_DATE,
+                appointment_time=SLOT_TIME,
+                status="pending",
+            )
+    assert not Booking.is_patient_conflict(doctor_conflict.value)
+    assert active_bookings(doctor=doctor).count() == 1
+
+
+def test_constraints_reject_a_patient_double_booking(doctor):
+    booking = BookingFactory(
+        doctor=doctor,
+        appointment_date=SLOT_DATE,
+        appointment_time=SLOT_TIME,
+        status="pending",
+    )
+    with pytest.raises(IntegrityError) as patient_conflict:
+        with transaction.atomic():
+            BookingFactory(
+                patient=booking.patient,
+                appointment_date=SLOT_DATE,
+                appointment_time=SLOT_TIME,
+                status="confirmed",
+            )
+    assert Booking.is_patient_conflict(patient_conflict.value)
+
+
+# Slot holds
+
+
+def free_times(doctor, patient=None):
+    slots = AvailabilityEngine(doctor, patient).get_free_slots(SLOT_DATE, days=1)
+    return {slot["time"] for slot in slots[SLOT_DATE]}
+
+
+def hold(client, patient, doctor, **data):
+    client.force_login(patient)
+    return client.post(
+        reverse("bookings:hold-slot", args=[doctor.username]),
+        data or slot_data(),
+        HTTP_HX_REQUEST="true",
+    )
+
+
+def test_a_hold_hides_the_slot_from_other_patients_only(doctor):
+    holder = PatientFactory()
+    assert hold_slot(doctor, holder, SLOT_DATE, SLOT_TIME)
+
+    assert SLOT_TIME not in free_times(doctor, PatientFactory())
+    assert SLOT_TIME in free_times(doctor, holder)
+
+
+def test_an_expired_hold_is_replaced(doctor):
+    hold_slot(doctor, PatientFactory(), SLOT_DATE, SLOT_TIME)
+    SlotHold.objects.update(expires_at=timezone.now())
+
+    patient = PatientFactory()
+    assert hold_slot(doctor, patient, SLOT_DATE, SLOT_TIME)
+    assert SlotHold.objects.get().patient == patient
+
+
+def test_booking_a_slot_held_by_someone_else_is_refused(client, doctor):
+    hold_slot(doctor, PatientFactory(), SLOT_DATE, SLOT_TIME)
+    response, messages = book(client, PatientFactory(), doctor)
+
+    assert response.url == reverse(
+        "bookings:doctor-booking-view", args=[doctor.username]
+    )
+    assert messages[-1] == (
+        "This time slot is being booked by another patient. Please choose another"
+    )
+    assert not Booking.objects.filter(doctor=doctor).exists()
+
+
+def test_booking_releases_the_hold(client, doctor):
+    patient = PatientFactory()
+    hold_slot(doctor, patient, SLOT_DATE, SLOT_TIME)
+    book(client, patient, doctor)
+
+    assert active_bookings(doctor=doctor, patient=patient).exists()
+    assert not SlotHold.objects.exists()
+
+
+def test_hold_view_answers_slot_held_then_slot_taken(client, doctor):
+    response = hold(client, PatientFactory(), doctor)
+    assert response.status_code == 204
+    assert "slot-held" in json.loads(response["HX-Trigger"])
+
+    response = hold(client, PatientFactory(), doctor)
+    events = json.loads(response["HX-Trigger"])
+    assert "slot-taken" in events
+    assert events["slot-taken"] == {
+        "date": SLOT_DATE.isoformat(),
+        "time": SLOT_TIME.strftime("%H:%M"),
+    }
+    assert SlotHold.objects.count() == 1
+
+
+def test_hold_view_rejects_slots_that_do_not_exist(client, doctor):
+    patient = PatientFactory()
+    past = slot_data(date.today() - timedelta(days=1))
+    off_schedule = slot_data(appointment_time=time(3, 17))
+
+    assert hold(client, patient, doctor, **past).status_code == 400
+    assert hold(client, patient, doctor, **off_schedule).status_code == 400
+    assert not SlotHold.objects.exists()
+
+
+def test_only_patients_can_hold_slots(client, doctor):
+    assert hold(client, DoctorFactory(), doctor).status_code == 403
+    assert not SlotHold.objects.exists()
@@ -3,6 +3,7 @@ from django.urls import path
 from .views import (
     BookingView,
     BookingCreateView,
+    SlotHoldView,
     BookingSuccessView,
     BookingInvoiceView,
     BookingListView,
@@ -21,6 +22,11 @@ urlpatterns = [
         BookingCreateView.as_view(),
         name="create-booking",
     ),
+    path(
+        "hold/<str:username>/",
+        SlotHoldView.as_view(),
+        name="hold-slot",
+    ),
     path(
         "<int:booking_id>/success/",
         BookingSuccessView.as_view(),
@@ -1,15 +1,19 @@
+import json
 from datetime import datetime, timedelta
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import View
-from django.http import HttpRequest, Http404
+from django.http import HttpRequest, Http404, HttpResponse, HttpResponseBadRequest
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.views.generic.base import TemplateView
 
 from accounts.models import User
-from doctors.models.general import TimeRange
 from mixins.custom_mixins import PatientRequiredMixin
+from .availability import AvailabilityEngine
+from .holds import hold_slot, is_held_by_other, release_hold
 from .models import Booking
+from utils.htmx import render_toast_message
 from django_ratelimit.decorators import ratelimit
 from django.db import transaction, IntegrityError
 from django.utils.decorators import method_decorator
@@ -20,7 +24,7 @@ class BookingView(LoginRequiredMixin, View):
 
     def get_week_dates(self):
         """Get the next 7 days starting from today"""
-        today = datetime.now().date()
+        today = timezone.localdate()
         week_dates = []
         for i in range(7):
             date = today + timedelta(days=i)
@@ -36,70 +40,20 @@ class BookingView(LoginRequiredMixin, View):
             )
         return week_dates
 
-    def get_available_slots(self, doctor, date):
-        """Get available time slots for a specific date"""
-        day_name = date.strftime("%A").lower()
-        day_schedule = getattr(doctor, day_name, None)
-
-        if not day_schedule or not day_schedule.time_range.exists():
-            return []
-
-        booked_times = set(
-            doctor.appointments.filter(
-                appointment_date=date,
-                status__in=["pending", "confirmed"]
-            ).values_list('appointment_time', flat=True)
+    def get_available_slots(self, doctor, start_date, days=7):
+        """
+        Get available time slots for ``days`` dates from ``start_date``,
+        without the slots other patients are holding
+        """
+        return AvailabilityEngine(doctor, self.request.user).get_free_slots(
+            start_date, days
         )
 
-        time_slots = []
-        now = timezone.now()
-
-        for time_range in day_schedule.time_range.all():
-
-            # Get slot duration
-            slot_duration = time_range.get_slot_duration()
-
-            # Convert time range to slots (e.g., 30-minute intervals)
-            current_time = datetime.combine(date, time_range.start)
-            end_time = datetime.combine(date, time_range.end)
-
-            # Limit to prevent excessive iterations
-            max_slots = 50
-            slot_count = 0
-
-            while current_time < end_time and slot_count < max_slots:
-                slot_count += 1
-                # Skip past times
-                if date == now.date() and current_time.time() < now.time():
-                    current_time += timedelta(minutes=slot_duration)
-                    continue
-            
-                # Check if slot is available
-                if current_time.time() not in booked_times:
-                    time_slots.append({
-                    "time": current_time.time(),
-                    "formatted_time": current_time.strftime("%I:%M %p"),
-                })
-            
-                current_time += timedelta(minutes=slot_duration)
-                
-
-        return time_slots
-
     def get(self, request: HttpRequest, *args, **kwargs):
         try:
             doctor = (
                 User.objects.select_related("profile")
-                .prefetch_related(
-                    "sunday__time_range",
-                    "monday__time_range",
-                    "tuesday__time_range",
-                    "wednesday__time_range",
-                    "thursday__time_range",
-                    "friday__time_range",
-                    "saturday__time_range",
-                    "appointments",
-                )
+                .prefetch_related("weekly_availability")
                 .get(
                     username=kwargs["username"],
                     role=User.RoleChoices.DOCTOR,
@@ -112,13 +66,14 @@ class BookingView(LoginRequiredMixin, View):
         # Get week dates
         week_dates = self.get_week_dates()
 
-        # Get available slots for each day
-        schedule = {}
-        for date_info in week_dates:
-            date = datetime.strptime(date_info["full_date"], "%Y-%m-%d").date()
-            schedule[date_info["full_date"]] = self.get_available_slots(
-                doctor, date
-            )
+        # Get available slots for the whole week in one pass
+        slots = self.get_available_slots(
+            doctor, week_dates[0]["date"], len(week_dates)
+        )
+        schedule = {
+            date_info["full_date"]: slots[date_info["date"]]
+            for date_info in week_dates
+        }
 
         context = {
             "doctor": doctor,
@@ -140,7 +95,12 @@ class BookingCreateView(LoginRequiredMixin, View):
         return render(request, self.template_name)
 
     def post(self, request, username):
-        doctor = get_object_or_404(User, username=username, role="doctor", is_active=True)
+        doctor = get_object_or_404(
+            User.objects.select_related("profile"),
+            username=username,
+            role="doctor",
+            is_active=True,
+        )
         
         date = request.POST.get("selected_date")
         time = request.POST.get("selected_time")
@@ -163,80 +123,50 @@ class BookingCreateView(LoginRequiredMixin, View):
                 messages.error(request, "Cannot book appointments in the past")
                 return redirect("bookings:doctor-booking-view", username=username)
             
-            # FIX: Use atomic transaction with select_for_update to prevent race condition
-            with transaction.atomic():
-                # Lock BOTH doctor's schedule AND patient's schedule
-                locked_doctor_bookings = Booking.objects.select_for_update().filter(
-                    doctor=doctor,
-                    appointment_date=appointment_date,
-                    appointment_time=appointment_time,
-                    status__in=["pending", "confirmed"]
-                )
+            # Verify doctor availability (one indexed query for the week)
+            engine = AvailabilityEngine(doctor)
+            if not engine.has_schedule(appointment_date):
+                messages.error(request, f"Doctor not available on {appointment_date.strftime('%A')}s")
+                return redirect("bookings:doctor-booking-view", username=username)
 
-                locked_patient_bookings = Booking.objects.select_for_update().filter(
-                    patient=request.user,
-                    appointment_date=appointment_date,
-                    appointment_time=appointment_time,
-                    status__in=["pending", "confirmed"]
-                )
+            if not engine.is_scheduled(appointment_date, appointment_time):
+                messages.error(request, "Selected time outside doctor's working hours")
+                return redirect("bookings:doctor-booking-view", username=username)
 
-                if locked_doctor_bookings.exists():
-                    messages.error(request, "This time slot is already booked")
-                    return redirect("bookings:doctor-booking-view", username=username)
-                
-                if locked_patient_bookings.exists():
-                    messages.error(request, "You already have an appointment at this time")
-                    return redirect("bookings:doctor-booking-view", username=username)
-                
-                # Verify doctor availability
-                day_name = appointment_date.strftime("%A").lower()
-                day_schedule = getattr(doctor, day_name, None)
-                
-                if not day_schedule or not day_schedule.time_range.exists():
-                    messages.error(request, f"Doctor not available on {appointment_date.strftime('%A')}s")
-                    return redirect("bookings:doctor-booking-view", username=username)
-                
-                # Verify time within working hours
-                is_valid_time = False
-                for time_range in day_schedule.time_range.all():
-                    if time_range.start <= appointment_time <= time_range.end:
-                        is_valid_time = True
-                        break
-                
-                if not is_valid_time:
-                    messages.error(request, "Selected time outside doctor's working hours")
-                    return redirect("bookings:doctor-booking-view", username=username)
-                
-                # Prevent double booking by same patient
-                patient_existing = Booking.objects.filter(
-                    patient=request.user,
-                    appointment_date=appointment_date,
-                    appointment_time=appointment_time,
-                    status__in=["pending", "confirmed"]
-                ).exists()
-                
-                if patient_existing:
+            # Someone else is checking out this slot (one indexed lookup)
+            if is_held_by_other(doctor, request.user, appointment_date, appointment_time):
+                messages.error(request, "This time slot is being booked by another patient. Please choose another")
+                return redirect("bookings:doctor-booking-view", username=username)
+
+            # ✅ One INSERT, no locks or pre-checks: the partial unique
+            # constraints reject a second active booking for the doctor's
+            # slot or the patient's time. The atomic block keeps the stats
+            # receivers with the insert and rolls both back on a conflict
+            try:
+                with transaction.atomic():
+                    booking = Booking.objects.create(
+                        doctor=doctor,
+                        patient=request.user,
+                        appointment_date=appointment_date,
+                        appointment_time=appointment_time,
+                        status="pending",
+                        # Snapshot the price so revenue never needs the profile join
+                        fee=doctor.profile.price_per_consultation,
+                    )
+                    release_hold(request.user)
+            except IntegrityError as e:
+                if Booking.is_patient_conflict(e):
                     messages.error(request, "You already have an appointment at this time")
-                    return redirect("bookings:doctor-booking-view", username=username)
-                
-                # Create booking atomically
-                booking = Booking.objects.create(
-                    doctor=doctor,
-                    patient=request.user,
-                    appointment_date=appointment_date,
-                    appointment_time=appointment_time,
-                    status="pending"
-                )
-            
+                else:
+                    messages.error(request, "This time slot was just booked. Please choose another")
+                return redirect("bookings:doctor-booking-view", username=username)
+
             messages.success(
                 request,
                 f"Appointment booked for {appointment_date} at {appointment_time.strftime('%I:%M %p')}"
             )
             return redirect("bookings:booking-success", booking_id=booking.id)
             
-        except IntegrityError:
-            messages.error(request, "This time slot was just booked. Please choose another")
-            return redirect("bookings:doctor-booking-view", username=username)
         except ValueError:
             messages.error(request, "Invalid date or time format")
             return redirect("bookings:doctor-booking-view", username=username)
@@ -248,6 +178,54 @@ class BookingCreateView(LoginRequiredMixin, View):
             return redirect("bookings:doctor-booking-view", username=username)
 
 
+@method_decorator(ratelimit(key='user', rate='120/h'), name='dispatch')
+class SlotHoldView(PatientRequiredMixin, View):
+    """
+    HTMX: reserve the slot a patient just picked for SLOT_HOLD_TTL seconds
+    (see bookings.holds). Answers with a "slot-held" or "slot-taken" event.
+    """
+
+    def post(self, request, username):
+        doctor = get_object_or_404(
+            User, username=username, role=User.RoleChoices.DOCTOR, is_active=True
+        )
+        try:
+            appointment_date = datetime.strptime(
+                request.POST.get("selected_date", ""), "%Y-%m-%d"
+            ).date()
+            appointment_time = datetime.strptime(
+                request.POST.get("selected_time", ""), "%H:%M"
+            ).time()
+        except ValueError:
+            return HttpResponseBadRequest("Invalid date or time format")
+
+        # Only real, upcoming slots can be held (same checks as booking)
+        appointment_datetime = timezone.make_aware(
+            datetime.combine(appointment_date, appointment_time)
+        )
+        if appointment_datetime < timezone.now() or not AvailabilityEngine(
+            doctor
+        ).is_scheduled(appointment_date, appointment_time):
+            return HttpResponseBadRequest("Slot not available")
+
+        slot = {
+            "date": request.POST["selected_date"],
+            "time": request.POST["selected_time"],
+        }
+        if hold_slot(doctor, request.user, appointment_date, appointment_time):
+            response = HttpResponse(status=204)
+            events = {"slot-held": {**slot, "seconds": settings.SLOT_HOLD_TTL}}
+        else:
+            response = render_toast_message(
+                "Slot taken",
+                "Another patient is booking this time slot. Please choose another",
+                "warning",
+            )
+            events = {**json.loads(response["HX-Trigger"]), "slot-taken": slot}
+        response["HX-Trigger"] = json.dumps(events)
+        return response
+
+
 class BookingSuccessView(LoginRequiredMixin, TemplateView):
     template_name = "bookings/booking-success.html"
 
@@ -279,8 +257,10 @@ class BookingInvoiceView(LoginRequiredMixin, TemplateView):
         context["booking"] = booking
         context["issued_date"] = booking.booking_date.strftime("%d/%m/%Y")
 
-        # Calculate invoice amounts
-        consultation_fee = booking.doctor.profile.price_per_consultation
+        # Calculate invoice amounts from the fee charged at booking time
+        consultation_fee = booking.fee
+        if consultation_fee is None:
+            consultation_fee = booking.doctor.profile.price_per_consultation
         context["subtotal"] = consultation_fee
         context["total"] = (
             consultation_fee  # Add any additional fees/discounts here
@@ -0,0 +1,119 @@
+from datetime import date, time, timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from core.factories import (
+    BookingFactory,
+    DoctorFactory,
+    PatientFactory,
+    ReviewFactory,
+    WeeklyAvailabilityFactory,
+)
+from core.jobs import run_pending
+from doctors.models import WeeklyAvailability
+
+
+class Clinic:
+    """
+    A seeded clinic around one doctor, one patient and one superuser (the
+    users the views are requested as). ``grow()`` adds another batch of
+    doctors, patients, bookings and reviews touching all three, so a view
+    can be measured before and after its data grows.
+    """
+
+    def __init__(self):
+        self.doctor = DoctorFactory(username="doctor")
+        self.patient = PatientFactory(username="patient")
+        self.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="password"
+        )
+        for weekday in WeeklyAvailability.Weekday.values:
+            WeeklyAvailabilityFactory(doctor=self.doctor, weekday=weekday)
+        self._slot = 0
+        self.grow()
+
+    def _today_slot(self):
+        # Distinct times so today's bookings never hit the unique constraint,
+        # off the quarter hours that BookingFactory's sequence uses
+        self._slot += 1
+        return time(8 + self._slot // 4 % 10, self._slot % 4 * 15 + 5)
+
+    def grow(self, size=5):
+        today = date.today()
+        for doctor in DoctorFactory.create_batch(size):
+            for weekday in WeeklyAvailability.Weekday.values:
+                WeeklyAvailabilityFactory(doctor=doctor, weekday=weekday)
+
+        for doctor, patient in zip(
+            DoctorFactory.create_batch(size), PatientFactory.create_batch(size)
+        ):
+            # Bookings and reviews on both the doctor's and the patient's
+            # side, spread over past and upcoming dates, and some today
+            BookingFactory(doctor=self.doctor, patient=patient)
+            BookingFactory(doctor=doctor, patient=self.patient)
+            BookingFactory(
+                doctor=self.doctor,
+                patient=patient,
+                appointment_date=today,
+                appointment_time=self._today_slot(),
+                status="confirmed",
+            )
+            BookingFactory(
+                doctor=doctor,
+                patient=self.patient,
+                appointment_date=today + timedelta(days=1),
+                appointment_time=self._today_slot(),
+                status="pending",
+            )
+            ReviewFactory(booking__doctor=self.doctor, booking__patient=patient)
+            ReviewFactory(booking__doctor=doctor, booking__patient=self.patient)
+            BookingFactory(doctor=doctor, patient=patient)
+        # The rollups the booking signals deferred, as the worker would
+        run_pending()
+
+
+@pytest.fixture
+def clinic(db):
+    return Clinic()
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def query_budget(client, clinic):
+    """
+    Assert that a page stays within ``budget`` queries and that its query
+    count does not change when the clinic's data grows (no N+1).
+
+    Usage: ``query_budget(url, budget, user=clinic.doctor)``.
+    """
+
+    def count_queries(url):
+        # Cached fragments would hide the queries being measured
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.status_code == 200, f"{url}: {response.status_code}"
+        return len(queries)
+
+    def check(url, budget, user=None):
+        if user is not None:
+            client.force_login(user)
+        before = count_queries(url)
+        clinic.grow()
+        after = count_queries(url)
+        assert after == before, (
+            f"{url}: {before} queries before growing the data, {after} after"
+        )
+        assert after <= budget, f"{url}: {after} queries, budget is {budget}"
+
+    return check
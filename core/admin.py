@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from core.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("task", "status", "run_at", "attempts", "locked_by")
+    list_filter = ("status", "task")
+    search_fields = ("task", "unique_key")
+    readonly_fields = ("created_at", "locked_at", "locked_by", "last_error")
@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     name = "core"
+
+    def ready(self):
+        import core.signals
+
+        # Register every app's background jobs (see core.jobs)
+        autodiscover_modules("tasks")
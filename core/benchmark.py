@@ -0,0 +1,546 @@
+import random
+import re
+import statistics
+import subprocess
+import time as timer
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from accounts.services import bulk_register_users
+from bookings.models import Booking, DailyBookingStats
+from core.instrumentation import RequestMetrics
+from core.models import Review
+from core.ratings import rebuild_ratings
+from doctors.models import WeeklyAvailability
+from doctors.search import ensure_search_indexes
+from doctors.views import DoctorsListView
+from utils.pagination import encode_cursor
+
+# Seeded users are recognisable (and removable) by their username prefix
+PREFIX = "bench_"
+
+SCALES = {
+    "small": {"doctors": 50, "patients": 1_000, "bookings": 20_000},
+    "medium": {"doctors": 200, "patients": 20_000, "bookings": 500_000},
+    "large": {"doctors": 1_000, "patients": 100_000, "bookings": 5_000_000},
+}
+
+SPECIALIZATIONS = [
+    "Cardiology", "Dermatology", "Neurology", "Pediatrics", "Orthopedics",
+    "Psychiatry", "Gynecology", "Dentistry", "Ophthalmology", "ENT",
+]
+CITIES = ["Hà Nội", "Hồ Chí Minh", "Đà Nẵng", "Hải Phòng", "Cần Thơ"]
+# Timed by "doctors_search"; one of SPECIALIZATIONS, so it matches a share
+# of the doctors
+SEARCH_TERM = "cardiology"
+
+# Every seeded doctor works Monday-Friday, 08:00-12:00 and 13:00-17:00
+WORKING_RANGES = [(time(8), time(12)), (time(13), time(17))]
+SLOTS_PER_HOUR = 4
+SLOT_TIMES = [
+    time(start.hour + minutes // 60, minutes % 60)
+    for start, end in WORKING_RANGES
+    for minutes in range(0, (end.hour - start.hour) * 60, 60 // SLOTS_PER_HOUR)
+]
+
+# Share of completed bookings that get a review
+REVIEW_RATE = 0.3
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _working_days(start, count):
+    """``count`` consecutive Monday-Friday dates from ``start``."""
+    day = start
+    while count:
+        if day.weekday() < 5:
+            yield day
+            count -= 1
+        day += timedelta(days=1)
+
+
+def _booking_status(rng, appointment_date, today):
+    if appointment_date < today:
+        return rng.choices(
+            ["completed", "cancelled", "no_show", "confirmed"], [70, 15, 5, 10]
+        )[0]
+    return rng.choices(["pending", "confirmed", "cancelled"], [50, 40, 10])[0]
+
+
+def _create_users(rng, role, count, password, batch_size):
+    """Bulk insert users with their profiles; (user id, fee) pairs."""
+    entries = []
+    for i in range(1, count + 1):
+        user = User(
+            username=f"{PREFIX}{role}{i}",
+            email=f"{PREFIX}{role}{i}@example.com",
+            password=password,
+            first_name=f"{role.title()}{i}",
+            last_name=rng.choice(["Nguyễn", "Trần", "Lê", "Phạm"]),
+            role=role,
+        )
+        profile = {
+            "gender": rng.choice(["male", "female"]),
+            "city": rng.choice(CITIES),
+        }
+        if role == User.RoleChoices.DOCTOR:
+            profile["specialization"] = rng.choice(SPECIALIZATIONS)
+            profile["price_per_consultation"] = Decimal(
+                rng.randrange(200000, 1000000, 10000)
+            )
+        entries.append((user, profile))
+    users = bulk_register_users(entries, batch_size=batch_size)
+    return [
+        (user.id, profile.get("price_per_consultation"))
+        for user, (_, profile) in zip(users, entries)
+    ]
+
+
+def _booking_rows(rng, doctors, patient_ids, total, today):
+    """
+    Yield ``total`` bookings spread evenly over the doctors, filling each
+    doctor's working-day slots in order. Most are in the past, as in a
+    clinic that has been running for a while.
+
+    Within one (day, slot) the doctors get consecutive patients from a
+    random offset, so no patient is booked twice at the same time (the
+    unique_active_patient_slot constraint) while there are at least as
+    many patients as doctors.
+    """
+    offsets = {}
+    per_doctor = total // len(doctors)
+    days_needed = -(-per_doctor // len(SLOT_TIMES))
+    # About 80% of the (calendar) days are history, the rest upcoming
+    back = days_needed * 7 // 5 * 4 // 5
+    start = today - timedelta(days=back)
+    for index, (doctor_id, fee) in enumerate(doctors):
+        count = per_doctor + (1 if index < total % len(doctors) else 0)
+        days = _working_days(start, -(-count // len(SLOT_TIMES)))
+        for day in days:
+            for slot in SLOT_TIMES[:count]:
+                if (day, slot) not in offsets:
+                    offsets[day, slot] = rng.randrange(len(patient_ids))
+                patient = (offsets[day, slot] + index) % len(patient_ids)
+                yield Booking(
+                    doctor_id=doctor_id,
+                    patient_id=patient_ids[patient],
+                    appointment_date=day,
+                    appointment_time=slot,
+                    status=_booking_status(rng, day, today),
+                    fee=fee,
+                )
+            count -= len(SLOT_TIMES)
+
+
+def seed_dataset(
+    doctors, patients, bookings, seed=42, batch_size=5000, log=print
+):
+    """
+    Insert a synthetic clinic with bulk_create: doctors and patients with
+    profiles, weekly schedules, bookings and reviews, then rebuild the
+    derived tables that signals would normally maintain.
+
+    The same arguments always produce the same data.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    password = make_password("password")
+
+    with transaction.atomic():
+        log(f"Creating {doctors} doctors and {patients} patients")
+        doctor_rows = _create_users(
+            rng, User.RoleChoices.DOCTOR, doctors, password, batch_size
+        )
+        patient_ids = [
+            user_id
+            for user_id, _ in _create_users(
+                rng, User.RoleChoices.PATIENT, patients, password, batch_size
+            )
+        ]
+        User.objects.create_superuser(
+            username=f"{PREFIX}admin",
+            email=f"{PREFIX}admin@example.com",
+            password="password",
+        )
+
+        WeeklyAvailability.objects.bulk_create(
+            [
+                WeeklyAvailability(
+                    doctor_id=doctor_id,
+                    weekday=weekday,
+                    start=start,
+                    end=end,
+                    slots_per_hour=SLOTS_PER_HOUR,
+                )
+                for doctor_id, _ in doctor_rows
+                for weekday in range(5)
+                for start, end in WORKING_RANGES
+            ],
+            batch_size=batch_size,
+        )
+
+    log(f"Creating {bookings} bookings")
+    created_bookings = 0
+    rows = _booking_rows(rng, doctor_rows, patient_ids, bookings, today)
+    for batch in _batches(rows, batch_size):
+        # One transaction per batch keeps memory and WAL bounded
+        with transaction.atomic():
+            Booking.objects.bulk_create(batch)
+            Review.objects.bulk_create(
+                [
+                    Review(
+                        booking_id=booking.id,
+                        doctor_id=booking.doctor_id,
+                        patient_id=booking.patient_id,
+                        rating=rng.choices([1, 2, 3, 4, 5], [5, 5, 15, 35, 40])[0],
+                        review="Synthetic review",
+                    )
+                    for booking in batch
+                    if booking.status == "completed"
+                    and rng.random() < REVIEW_RATE
+                ]
+            )
+        created_bookings += len(batch)
+        if created_bookings % (batch_size * 20) == 0:
+            log(f"  {created_bookings} bookings")
+
+    # bulk_create skips the signals that keep these up to date
+    log("Rebuilding ratings, daily stats and search indexes")
+    rebuild_ratings()
+    DailyBookingStats.rebuild(batch_size=batch_size)
+    if settings.ADMIN_PATIENT_STATS_CACHED:
+        call_command("rebuild_patient_stats", batch_size=batch_size)
+    ensure_search_indexes()
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    return {
+        "doctors": doctors,
+        "patients": patients,
+        "bookings": created_bookings,
+        "reviews": Review.objects.filter(
+            doctor__username__startswith=PREFIX
+        ).count(),
+    }
+
+
+def delete_dataset():
+    """Remove everything seed_dataset created (cascades to bookings)."""
+    deleted, _ = User.objects.filter(username__startswith=PREFIX).delete()
+    return deleted
+
+
+# Measurements
+
+
+def _percentile(values, percent):
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def _summary(durations):
+    milliseconds = [d * 1000 for d in durations]
+    return {
+        "min_ms": round(min(milliseconds), 2),
+        "median_ms": round(statistics.median(milliseconds), 2),
+        "mean_ms": round(statistics.fmean(milliseconds), 2),
+        "p95_ms": round(_percentile(milliseconds, 95), 2),
+        "max_ms": round(max(milliseconds), 2),
+    }
+
+
+def benchmark_settings():
+    """
+    Settings overrides for measuring: no DEBUG query log or toolbar, no
+    rate limits, and unhashed static URLs so collectstatic is not required.
+    """
+    return override_settings(
+        DEBUG=False,
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+        # The booking view allows 10 bookings an hour per user
+        RATELIMIT_ENABLE=False,
+        STORAGES={
+            **settings.STORAGES,
+            "staticfiles": {
+                "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+            },
+        },
+    )
+
+
+def hot_views():
+    """(name, url, username of the user to log in as or None)."""
+    doctor = (
+        User.objects.filter(username__startswith=f"{PREFIX}doctor")
+        .order_by("id")
+        .first()
+    )
+    if doctor is None:
+        raise ValueError("No benchmark data, run seed_benchmark_data first")
+    patient = f"{PREFIX}patient1"
+    admin = f"{PREFIX}admin"
+    # The cursor of the last page of the directory in its default order
+    # (-pk); keyset pagination should make it as cheap as the first page
+    directory = User.objects.filter(
+        role=User.RoleChoices.DOCTOR, is_superuser=False, is_active=True
+    ).order_by("-pk")
+    page_size = DoctorsListView.paginate_by
+    last_page_start = (directory.count() - 1) // page_size * page_size
+    last_page_url = reverse("doctors:list")
+    if last_page_start:
+        after = directory.values_list("pk", flat=True)[last_page_start - 1]
+        last_page_url += f"?cursor={encode_cursor(['next', after])}"
+    return [
+        ("doctors_list", reverse("doctors:list"), None),
+        ("doctors_list_last_page", last_page_url, None),
+        (
+            "doctors_search",
+            reverse("doctors:list") + f"?q={SEARCH_TERM}",
+            None,
+        ),
+        (
+            "doctor_profile",
+            reverse("doctors:doctor-profile", args=[doctor.username]),
+            None,
+        ),
+        (
+            "booking_page",
+            reverse("bookings:doctor-booking-view", args=[doctor.username]),
+            patient,
+        ),
+        ("doctor_dashboard", reverse("doctors:dashboard"), doctor.username),
+        ("doctor_appointments", reverse("doctors:appointments"), doctor.username),
+        ("doctor_my_patients", reverse("doctors:my-patients"), doctor.username),
+        ("patient_dashboard", reverse("patients:dashboard"), patient),
+        ("admin_dashboard", reverse("admin-dashboard"), admin),
+        ("admin_patients", reverse("admin-patients"), admin),
+        ("admin_appointments", reverse("admin-appointments"), admin),
+        ("appointment_report", reverse("admin-appointment-report"), admin),
+        ("revenue_report", reverse("admin-revenue-report"), admin),
+    ]
+
+
+def time_view(client, url, repeat, warmup=1, clear_cache=True):
+    """Request ``url`` ``repeat`` times; timings plus queries per request."""
+    durations = []
+    sql_times = []
+    status = queries = None
+    for run in range(warmup + repeat):
+        if clear_cache:
+            cache.clear()
+        metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            start = timer.perf_counter()
+            response = client.get(url, secure=True)
+            elapsed = timer.perf_counter() - start
+        if run < warmup:
+            continue
+        durations.append(elapsed)
+        sql_times.append(metrics.sql_time * 1000)
+        status = response.status_code
+        queries = metrics.queries
+    return {
+        "url": url,
+        "status": status,
+        "queries": queries,
+        "sql_median_ms": round(statistics.median(sql_times), 2),
+        **_summary(durations),
+    }
+
+
+def check_search_narrows(client, url):
+    """
+    Fail unless the search page reports fewer matches than there are
+    doctors, so "doctors_search" really times the search path.
+    """
+    directory = User.objects.filter(
+        role=User.RoleChoices.DOCTOR, is_superuser=False, is_active=True
+    ).count()
+    content = client.get(url, secure=True).content.decode()
+    found = re.search(r"(\d+) matches found for", content)
+    if found is None or not 0 < int(found.group(1)) < directory:
+        raise AssertionError(
+            f"{url} does not narrow the directory of {directory} doctors "
+            f"({found.group(0) if found else 'no search results shown'})"
+        )
+
+
+def benchmark_views(repeat=5, warmup=1, clear_cache=True, log=print):
+    results = {}
+    users = {}
+    for name, url, username in hot_views():
+        client = Client()
+        if username:
+            user = users.get(username) or User.objects.get(username=username)
+            users[username] = user
+            client.force_login(user)
+        if name == "doctors_search":
+            check_search_narrows(client, url)
+        results[name] = time_view(client, url, repeat, warmup, clear_cache)
+        log(
+            f"{name:24} {results[name]['median_ms']:>9.2f} ms "
+            f"{results[name]['queries']:>4} queries"
+        )
+    return results
+
+
+def _free_slots(doctor, count, today):
+    """``count`` open future slots of ``doctor`` beyond the seeded range."""
+    last = (
+        Booking.objects.filter(doctor=doctor)
+        .order_by("-appointment_date")
+        .values_list("appointment_date", flat=True)
+        .first()
+    ) or today
+    first_day = max(last, today) + timedelta(days=1)
+    days = _working_days(first_day, -(-count // len(SLOT_TIMES)))
+    return [
+        (day, slot) for day in days for slot in SLOT_TIMES
+    ][:count]
+
+
+def benchmark_booking_concurrency(
+    threads=8, attempts_per_thread=20, contended=False, log=print
+):
+    """
+    Book slots of one doctor from ``threads`` patients at once through
+    BookingCreateView. Each thread gets its own slots unless ``contended``,
+    in which case every thread races for the same ones. The bookings made
+    are deleted again afterwards.
+    """
+    if connection.vendor == "sqlite":
+        raise ValueError(
+            "The concurrency benchmark needs a database server (threads do "
+            "not share an in-memory SQLite database)"
+        )
+    doctor = (
+        User.objects.filter(username__startswith=f"{PREFIX}doctor")
+        .order_by("id")
+        .first()
+    )
+    patients = list(
+        User.objects.filter(username__startswith=f"{PREFIX}patient").order_by(
+            "id"
+        )[:threads]
+    )
+    today = date.today()
+    per_thread = attempts_per_thread
+    slots = _free_slots(
+        doctor, per_thread if contended else per_thread * len(patients), today
+    )
+    url = reverse("bookings:create-booking", args=[doctor.username])
+
+    def run(index):
+        client = Client()
+        client.force_login(patients[index])
+        own = slots if contended else slots[index::len(patients)]
+        outcomes = []
+        try:
+            for day, slot in own:
+                start = timer.perf_counter()
+                response = client.post(
+                    url,
+                    {
+                        "selected_date": day.isoformat(),
+                        "selected_time": slot.strftime("%H:%M"),
+                    },
+                    secure=True,
+                )
+                elapsed = timer.perf_counter() - start
+                booked = response.status_code == 302 and "/success/" in (
+                    response.url
+                )
+                outcomes.append((elapsed, booked, response.status_code))
+        finally:
+            connections.close_all()
+        return outcomes
+
+    start = timer.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(patients)) as pool:
+        outcomes = [
+            outcome
+            for outcomes in pool.map(run, range(len(patients)))
+            for outcome in outcomes
+        ]
+    wall = timer.perf_counter() - start
+
+    created = Booking.objects.filter(
+        doctor=doctor, appointment_date__gte=slots[0][0]
+    )
+    booked = created.count()
+    created.delete()
+
+    result = {
+        "threads": len(patients),
+        "attempts": len(outcomes),
+        "contended": contended,
+        "booked": booked,
+        # A redirect back to the booking page is a refused slot; anything
+        # but a redirect (403, 5xx, ...) is an error
+        "rejected": sum(1 for _, ok, status in outcomes if not ok and status == 302),
+        "errors": sum(1 for _, _, status in outcomes if status != 302),
+        "wall_s": round(wall, 3),
+        "requests_per_s": round(len(outcomes) / wall, 2),
+        **_summary([elapsed for elapsed, _, _ in outcomes]),
+    }
+    log(
+        f"booking x{result['threads']}: {result['requests_per_s']} req/s, "
+        f"{result['booked']} booked, {result['rejected']} rejected, "
+        f"median {result['median_ms']} ms"
+    )
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def dataset_counts():
+    users = User.objects.all()
+    return {
+        "doctors": users.filter(username__startswith=f"{PREFIX}doctor").count(),
+        "patients": users.filter(username__startswith=f"{PREFIX}patient").count(),
+        "bookings": Booking.objects.count(),
+        "reviews": Review.objects.count(),
+    }
+
+
+def run_metadata():
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "database": connection.vendor,
+        "cache": settings.CACHES["default"]["BACKEND"],
+        "dataset": dataset_counts(),
+    }
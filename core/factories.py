@@ -1,21 +1,109 @@
+from datetime import date, time, timedelta
+
 import factory.fuzzy
 from faker import Faker
 
 from accounts.models import User
+from bookings.models import Booking
+from core.models import Review
+from doctors.models import TimeRange, WeeklyAvailability
 
 fake = Faker()
 
+SPECIALIZATIONS = ["Cardiology", "Dermatology", "Neurology", "Pediatrics"]
+
 
 class UserFactory(factory.django.DjangoModelFactory):
     """A factory to random users for testing purposes."""
 
     class Meta:
         model = User
+        skip_postgeneration_save = True
 
+    username = factory.Sequence(lambda n: f"user{n}")
     first_name = factory.fuzzy.FuzzyText(length=10)
     last_name = factory.fuzzy.FuzzyText(length=10)
     email = factory.Faker("email")
-    password = factory.PostGenerationMethodCall("set_password", "password")
+    password = factory.django.Password("password")
     role = factory.fuzzy.FuzzyChoice(User.RoleChoices.choices, getter=lambda c: c[0])
     registration_number = factory.fuzzy.FuzzyInteger(100000, 999999)
     is_active = True
+
+
+class DoctorFactory(UserFactory):
+    role = User.RoleChoices.DOCTOR
+
+    @factory.post_generation
+    def profile(obj, create, extracted, **kwargs):
+        if not create:
+            return
+        profile = obj.profile
+        profile.specialization = kwargs.get(
+            "specialization", fake.random_element(SPECIALIZATIONS)
+        )
+        profile.gender = kwargs.get("gender", fake.random_element(["male", "female"]))
+        profile.city = kwargs.get("city", fake.city())
+        profile.price_per_consultation = kwargs.get(
+            "price_per_consultation",
+            fake.random_int(200000, 1000000, step=10000),
+        )
+        profile.save()
+
+
+class PatientFactory(UserFactory):
+    role = User.RoleChoices.PATIENT
+
+
+def _appointment_date(n):
+    # Spread bookings from a month ago to a month ahead
+    return date.today() + timedelta(days=n % 60 - 30)
+
+
+def _appointment_time(n):
+    # Unique (date, time) pairs for the first 2400 bookings, so the
+    # doctor/date/time unique constraint never trips in tests
+    return time(8 + (n // 60) % 10, (n // 600) % 4 * 15)
+
+
+class BookingFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Booking
+
+    doctor = factory.SubFactory(DoctorFactory)
+    patient = factory.SubFactory(PatientFactory)
+    appointment_date = factory.Sequence(_appointment_date)
+    appointment_time = factory.Sequence(_appointment_time)
+    status = factory.fuzzy.FuzzyChoice(
+        ["pending", "confirmed", "completed", "cancelled"]
+    )
+    fee = factory.LazyAttribute(lambda o: o.doctor.profile.price_per_consultation)
+
+
+class ReviewFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Review
+
+    booking = factory.SubFactory(BookingFactory, status="completed")
+    doctor = factory.SelfAttribute("booking.doctor")
+    patient = factory.SelfAttribute("booking.patient")
+    rating = factory.fuzzy.FuzzyInteger(1, 5)
+    review = factory.Faker("sentence")
+
+
+class TimeRangeFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = TimeRange
+        django_get_or_create = ("start", "end")
+
+    start = time(9)
+    end = time(12)
+
+
+class WeeklyAvailabilityFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = WeeklyAvailability
+
+    doctor = factory.SubFactory(DoctorFactory)
+    weekday = factory.Iterator(WeeklyAvailability.Weekday.values)
+    start = time(9)
+    end = time(12)
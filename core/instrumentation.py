@@ -0,0 +1,268 @@
+"""
+Per-request database and template cost, cheap enough to leave on in
+production (no DEBUG query log needed).
+
+``RequestMetricsMiddleware`` counts the queries of every request through
+``connection.execute_wrapper`` and times template rendering through the
+``InstrumentedDjangoTemplates`` backend. Requests over the configured
+thresholds are logged as one JSON line each, and per-view totals are kept
+for the Prometheus endpoint (``/monitoring/metrics/``).
+"""
+
+import json
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+from threading import Lock
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+_current_metrics = ContextVar("request_metrics", default=None)
+
+# Histogram buckets for the number of queries per request
+QUERY_BUCKETS = (1, 5, 10, 25, 50, 100, 250)
+
+
+class RequestMetrics:
+    """Accumulates the cost of one request; also the execute wrapper."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.statements = Counter()
+        self._rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+            # Parameterised SQL: the statements of an N+1 loop are identical
+            self.statements[sql] += 1
+
+    @property
+    def duplicate_queries(self):
+        return sum(n - 1 for n in self.statements.values() if n > 1)
+
+    def most_repeated(self):
+        if not self.statements:
+            return None, 0
+        return self.statements.most_common(1)[0]
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _current_metrics.get()
+        # Only time the outermost render (render_to_string inside a view
+        # that is itself rendering would be counted twice otherwise)
+        if metrics is None or metrics._rendering:
+            return super().render(context, request)
+        metrics._rendering = True
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+            metrics._rendering = False
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing renders for request metrics."""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """
+    Per-view totals since the process started. Each worker process keeps
+    its own; the ``process`` label tells scraped workers apart.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._views = {}
+
+    def observe(self, view, metrics, duration, flagged):
+        with self._lock:
+            stats = self._views.setdefault(
+                view,
+                {
+                    "requests": 0,
+                    "flagged": 0,
+                    "duration": 0.0,
+                    "queries": 0,
+                    "sql_time": 0.0,
+                    "template_time": 0.0,
+                    "buckets": [0] * len(QUERY_BUCKETS),
+                },
+            )
+            stats["requests"] += 1
+            stats["flagged"] += bool(flagged)
+            stats["duration"] += duration
+            stats["queries"] += metrics.queries
+            stats["sql_time"] += metrics.sql_time
+            stats["template_time"] += metrics.template_time
+            for i, bound in enumerate(QUERY_BUCKETS):
+                if metrics.queries <= bound:
+                    stats["buckets"][i] += 1
+
+    def render(self):
+        """The totals in the Prometheus text exposition format."""
+        with self._lock:
+            views = {view: dict(stats) for view, stats in self._views.items()}
+
+        pid = os.getpid()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(
+                    f'{key}="{_escape_label(str(val))}"' for key, val in labels
+                )
+                lines.append(f"{name}{suffix}{{{label_text}}} {value}")
+
+        def per_view(key, suffix=""):
+            return [
+                (suffix, (("view", view), ("process", pid)), stats[key])
+                for view, stats in sorted(views.items())
+            ]
+
+        metric(
+            "roydclinic_requests_total",
+            "counter",
+            "Requests handled, by view.",
+            per_view("requests"),
+        )
+        metric(
+            "roydclinic_flagged_requests_total",
+            "counter",
+            "Requests over the query count, duplicate query or latency "
+            "thresholds.",
+            per_view("flagged"),
+        )
+        metric(
+            "roydclinic_request_duration_seconds",
+            "summary",
+            "Time spent in the Django request handler.",
+            per_view("duration", "_sum") + per_view("requests", "_count"),
+        )
+        metric(
+            "roydclinic_db_query_seconds_total",
+            "counter",
+            "Time spent executing SQL.",
+            per_view("sql_time"),
+        )
+        metric(
+            "roydclinic_template_render_seconds_total",
+            "counter",
+            "Time spent rendering templates (includes lazy queries).",
+            per_view("template_time"),
+        )
+        buckets = []
+        for view, stats in sorted(views.items()):
+            labels = (("view", view), ("process", pid))
+            for bound, count in zip(QUERY_BUCKETS, stats["buckets"]):
+                buckets.append(("_bucket", labels + (("le", bound),), count))
+            buckets.append(
+                ("_bucket", labels + (("le", "+Inf"),), stats["requests"])
+            )
+            buckets.append(("_sum", labels, stats["queries"]))
+            buckets.append(("_count", labels, stats["requests"]))
+        metric(
+            "roydclinic_db_queries_per_request",
+            "histogram",
+            "Number of SQL queries per request.",
+            buckets,
+        )
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetricsMiddleware:
+    """
+    Record query count, SQL time, template render time and view name for
+    every request. Disabled with ``REQUEST_METRICS=False``.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        self.record(request, response, metrics, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, metrics, duration):
+        match = request.resolver_match
+        view = match.view_name if match else "<unresolved>"
+
+        flags = []
+        if metrics.queries > settings.REQUEST_METRICS_QUERY_THRESHOLD:
+            flags.append("queries")
+        if (
+            metrics.duplicate_queries
+            > settings.REQUEST_METRICS_DUPLICATE_THRESHOLD
+        ):
+            flags.append("duplicates")
+        if duration * 1000 > settings.REQUEST_METRICS_SLOW_MS:
+            flags.append("slow")
+
+        registry.observe(view, metrics, duration, flags)
+
+        if not flags and not settings.REQUEST_METRICS_LOG_ALL:
+            return
+        entry = {
+            "event": "request_metrics",
+            "method": request.method,
+            "path": request.path,
+            "view": view,
+            "status": response.status_code,
+            "queries": metrics.queries,
+            "duplicate_queries": metrics.duplicate_queries,
+            "sql_ms": round(metrics.sql_time * 1000, 2),
+            "template_ms": round(metrics.template_time * 1000, 2),
+            "duration_ms": round(duration * 1000, 2),
+            "flags": flags,
+        }
+        if "duplicates" in flags:
+            # The likely N+1 statement (parameterised, so no values)
+            sql, count = metrics.most_repeated()
+            entry["most_repeated"] = {"sql": sql[:300], "count": count}
+        logger.log(
+            logging.WARNING if flags else logging.INFO, json.dumps(entry)
+        )
@@ -0,0 +1,194 @@
+import logging
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import Job
+
+logger = logging.getLogger(__name__)
+
+# Task name -> function, filled by the @task decorator when the modules
+# defining them (by convention ``<app>/tasks.py``) are imported
+registry = {}
+
+
+class UnknownTask(LookupError):
+    pass
+
+
+def task(func=None, *, max_attempts=None):
+    """
+    Register ``func`` as a job. Call ``func.defer(**kwargs)`` to run it
+    later in a worker; keyword arguments must be JSON serializable.
+    """
+
+    def register(func):
+        name = f"{func.__module__}.{func.__name__}"
+        registry[name] = func
+        func.task_name = name
+
+        def defer(*, delay=None, run_at=None, unique_key=None, **kwargs):
+            return enqueue(
+                name,
+                kwargs,
+                delay=delay,
+                run_at=run_at,
+                unique_key=unique_key,
+                max_attempts=max_attempts,
+            )
+
+        func.defer = defer
+        return func
+
+    return register(func) if func is not None else register
+
+
+def enqueue(
+    name, kwargs=None, delay=None, run_at=None, unique_key=None, max_attempts=None
+):
+    """
+    Insert a job row, in the caller's transaction if there is one: a job
+    for a booking is only visible to workers once the booking committed.
+
+    ``run_at`` or ``delay`` (seconds or a timedelta) schedule it for later.
+    With ``unique_key``, nothing is added while a job with that key is
+    still queued. Returns the job (without a pk when it was merged).
+    """
+    if run_at is None:
+        run_at = timezone.now()
+        if delay is not None:
+            if not isinstance(delay, timedelta):
+                delay = timedelta(seconds=delay)
+            run_at += delay
+    job = Job(
+        task=name,
+        kwargs=kwargs or {},
+        run_at=run_at,
+        unique_key=unique_key,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+    if unique_key is None:
+        job.save()
+    else:
+        # One statement; ON CONFLICT DO NOTHING against the partial index
+        Job.objects.bulk_create([job], ignore_conflicts=True)
+    return job
+
+
+def default_worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def dequeue(batch_size=10, worker=None, now=None):
+    """
+    Claim up to ``batch_size`` due jobs in one short transaction. SKIP
+    LOCKED lets concurrent workers claim different rows instead of
+    waiting for each other (PostgreSQL; other backends ignore the lock).
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.QUEUED, run_at__lte=now)
+            .order_by("run_at", "id")[:batch_size]
+        )
+        if jobs:
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status=Job.Status.RUNNING,
+                attempts=F("attempts") + 1,
+                locked_at=now,
+                locked_by=worker or default_worker_name(),
+            )
+    for job in jobs:
+        job.status = Job.Status.RUNNING
+        job.attempts += 1
+    return jobs
+
+
+def backoff(attempts):
+    """Seconds before retry ``attempts``: exponential, capped, jittered."""
+    delay = min(
+        settings.JOBS_BACKOFF_BASE * 2 ** (attempts - 1), settings.JOBS_BACKOFF_MAX
+    )
+    return delay * random.uniform(0.5, 1)
+
+
+def _requeue(job, **fields):
+    """
+    Put a running job back in the queue. Returns 1, or 0 when the job was
+    dropped instead: a queued job with the same ``unique_key`` covers it.
+    """
+    try:
+        # The partial unique constraint decides, even against a concurrent
+        # enqueue() of the key; the savepoint keeps the caller usable
+        with transaction.atomic():
+            return Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING).update(
+                status=Job.Status.QUEUED, locked_at=None, locked_by="", **fields
+            )
+    except IntegrityError:
+        Job.objects.filter(pk=job.pk).delete()
+        return 0
+
+
+def run_job(job):
+    """Run a claimed job. Returns True on success."""
+    try:
+        func = registry.get(job.task)
+        if func is None:
+            raise UnknownTask(f"No task named {job.task!r}")
+        func(**job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            logger.warning(f"Job {job.pk} {job.task} failed, will retry: {error}")
+            _requeue(
+                job,
+                run_at=timezone.now() + timedelta(seconds=backoff(job.attempts)),
+                last_error=error,
+            )
+        else:
+            logger.error(f"Job {job.pk} {job.task} failed for good: {error}")
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.Status.FAILED,
+                locked_at=None,
+                locked_by="",
+                last_error=error,
+            )
+        return False
+    Job.objects.filter(pk=job.pk).delete()
+    return True
+
+
+def requeue_stale(now=None):
+    """
+    Put back jobs whose worker died mid-run (running for longer than
+    JOBS_STALE_AFTER). Their attempt still counts.
+    """
+    now = now or timezone.now()
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING,
+        locked_at__lt=now - timedelta(seconds=settings.JOBS_STALE_AFTER),
+    )
+    return sum(_requeue(job, run_at=now) for job in stale.only("pk"))
+
+
+def run_pending(batch_size=10, worker=None):
+    """
+    Run every job that is due now, batch by batch. Returns
+    ``(succeeded, failed)``. Used by the worker and in tests.
+    """
+    succeeded = failed = 0
+    while jobs := dequeue(batch_size, worker):
+        for job in jobs:
+            if run_job(job):
+                succeeded += 1
+            else:
+                failed += 1
+    return succeeded, failed
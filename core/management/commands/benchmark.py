@@ -0,0 +1,105 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import (
+    benchmark_booking_concurrency,
+    benchmark_settings,
+    benchmark_views,
+    run_metadata,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the hot views and concurrent booking creation against the "
+        "seed_benchmark_data dataset and write the results as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--warmup", type=int, default=1)
+        parser.add_argument(
+            "--warm-cache",
+            action="store_true",
+            help="Keep the cache between requests (default: clear it)",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Concurrent patients booking (0 skips the booking run)",
+        )
+        parser.add_argument("--attempts", type=int, default=20)
+        parser.add_argument(
+            "--contended",
+            action="store_true",
+            help="Make every thread race for the same slots",
+        )
+        parser.add_argument(
+            "--output", help="JSON file (default: benchmark-<commit>.json)"
+        )
+        parser.add_argument(
+            "--compare", help="Earlier results file to print the changes against"
+        )
+
+    def handle(self, *args, **options):
+        results = run_metadata()
+        self.stdout.write(
+            f"Commit {results['commit']}, {results['database']}, "
+            + ", ".join(f"{n} {k}" for k, n in results["dataset"].items())
+        )
+
+        with benchmark_settings():
+            try:
+                results["views"] = benchmark_views(
+                    repeat=options["repeat"],
+                    warmup=options["warmup"],
+                    clear_cache=not options["warm_cache"],
+                    log=self.stdout.write,
+                )
+                if options["threads"]:
+                    results["booking_concurrency"] = (
+                        benchmark_booking_concurrency(
+                            threads=options["threads"],
+                            attempts_per_thread=options["attempts"],
+                            contended=options["contended"],
+                            log=self.stdout.write,
+                        )
+                    )
+            except ValueError as e:
+                raise CommandError(e)
+
+        output = Path(
+            options["output"] or f"benchmark-{results['commit'] or 'local'}.json"
+        )
+        output.write_text(json.dumps(results, indent=2))
+
+        if options["compare"]:
+            self.compare(json.loads(Path(options["compare"]).read_text()), results)
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {output}"))
+
+    def compare(self, baseline, results):
+        self.stdout.write(f"\nMedian vs {baseline.get('commit')}:")
+        for name, current in results["views"].items():
+            before = baseline.get("views", {}).get(name)
+            if before is None:
+                continue
+            change = (
+                (current["median_ms"] - before["median_ms"])
+                / before["median_ms"]
+                * 100
+                if before["median_ms"]
+                else 0
+            )
+            line = (
+                f"{name:24} {before['median_ms']:>9.2f} -> "
+                f"{current['median_ms']:>9.2f} ms ({change:+.0f}%)"
+            )
+            if current["queries"] != before["queries"]:
+                line += f", queries {before['queries']} -> {current['queries']}"
+            self.stdout.write(
+                self.style.WARNING(line) if change > 10 else line
+            )
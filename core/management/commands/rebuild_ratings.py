@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized doctor rating aggregates from reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--doctor",
+            action="append",
+            type=int,
+            dest="doctor_ids",
+            help="Only rebuild the given doctor id (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        updated = rebuild_ratings(options["doctor_ids"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt rating aggregates for {updated} profiles")
+        )
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from core.benchmark import PREFIX, SCALES, delete_dataset, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk insert a synthetic dataset (doctors, patients, schedules, "
+        "bookings, reviews) for the benchmark command"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            choices=SCALES,
+            default="small",
+            help="Preset sizes: "
+            + ", ".join(
+                f"{name} ({', '.join(f'{n} {k}' for k, n in sizes.items())})"
+                for name, sizes in SCALES.items()
+            ),
+        )
+        parser.add_argument("--doctors", type=int, help="Override the preset")
+        parser.add_argument("--patients", type=int, help="Override the preset")
+        parser.add_argument("--bookings", type=int, help="Override the preset")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Delete a previously seeded dataset first",
+        )
+
+    def handle(self, *args, **options):
+        sizes = {
+            key: options[key] if options[key] is not None else default
+            for key, default in SCALES[options["scale"]].items()
+        }
+        if sizes["doctors"] < 1 or sizes["patients"] < 1:
+            raise CommandError("At least one doctor and one patient are needed")
+        if sizes["patients"] < sizes["doctors"]:
+            # Otherwise some patient would need two bookings at the same time
+            raise CommandError("There must be at least as many patients as doctors")
+
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            if not options["replace"]:
+                raise CommandError(
+                    "Benchmark data already exists, use --replace to reseed"
+                )
+            self.stdout.write("Deleting the previous dataset")
+            delete_dataset()
+
+        counts = seed_dataset(
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            log=self.stdout.write,
+            **sizes,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Seeded "
+                + ", ".join(f"{n} {key}" for key, n in counts.items())
+            )
+        )
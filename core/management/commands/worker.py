@@ -0,0 +1,71 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.jobs import default_worker_name, dequeue, requeue_stale, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs from the database queue until stopped. Start as "
+        "many workers as needed; they never claim the same job."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10,
+            help="Jobs claimed per dequeue",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help="Seconds to wait when the queue is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no job is due instead of waiting for more",
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        # Finish the batch in hand on docker stop / Ctrl+C, then exit
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        worker = default_worker_name()
+        succeeded = failed = 0
+        last_stale_check = 0
+        while not self.stopping:
+            close_old_connections()
+            if time.monotonic() - last_stale_check >= settings.JOBS_STALE_AFTER:
+                requeued = requeue_stale()
+                if requeued:
+                    self.stderr.write(f"Requeued {requeued} stale jobs")
+                last_stale_check = time.monotonic()
+
+            jobs = dequeue(options["batch_size"], worker)
+            for job in jobs:
+                if run_job(job):
+                    succeeded += 1
+                else:
+                    failed += 1
+            if not jobs:
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Worker {worker} stopped: {succeeded} jobs done, {failed} failed"
+            )
+        )
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import Q
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 import re
@@ -94,3 +96,56 @@ class Review(models.Model):
     @property
     def rating_percent(self):
         return (self.rating / 5) * 100
+
+
+class Job(models.Model):
+    """
+    A unit of deferred work for the database-backed queue (see core.jobs).
+    Succeeded jobs are deleted; failed ones stay for inspection.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        FAILED = "failed", "Failed"
+
+    task = models.CharField(max_length=255)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.QUEUED
+    )
+    # Queued jobs with the same key are merged, e.g. one stats refresh for
+    # a burst of bookings
+    unique_key = models.CharField(max_length=255, null=True, blank=True)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=255, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # ✅ The dequeue scan: only the queued rows, in run order
+            models.Index(
+                fields=["run_at", "id"],
+                condition=Q(status="queued"),
+                name="job_queued_run_at",
+            ),
+            models.Index(
+                fields=["locked_at"],
+                condition=Q(status="running"),
+                name="job_running_locked_at",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["unique_key"],
+                condition=Q(status="queued"),
+                name="unique_queued_job_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.status})"
@@ -0,0 +1,61 @@
+import hmac
+
+from django.conf import settings
+from django.db import connections
+
+
+def monitoring_allowed(request):
+    """
+    Staff users, or requests carrying ``Authorization: Bearer <token>``
+    matching ``settings.MONITORING_TOKEN`` (for scrapers/load balancers).
+    """
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    token = settings.MONITORING_TOKEN
+    header = request.headers.get("Authorization", "")
+    if not token or not header.startswith("Bearer "):
+        return False
+    return hmac.compare_digest(header.removeprefix("Bearer "), token)
+
+
+def _pool_stats(pool):
+    stats = pool.get_stats()
+    size = stats.get("pool_size", 0)
+    idle = stats.get("pool_available", 0)
+    return {
+        "min_size": stats.get("pool_min"),
+        "max_size": stats.get("pool_max"),
+        "open": size,
+        "idle": idle,
+        "in_use": size - idle,
+        "waiting": stats.get("requests_waiting", 0),
+        # Counters since the pool was opened
+        "requests": stats.get("requests_num", 0),
+        "requests_queued": stats.get("requests_queued", 0),
+        "requests_wait_ms": stats.get("requests_wait_ms", 0),
+        "requests_errors": stats.get("requests_errors", 0),
+        "connections_lost": stats.get("connections_lost", 0),
+    }
+
+
+def database_connection_stats():
+    """
+    Connection state of this worker process for every configured database:
+    the persistent connection settings and, when psycopg's pool is enabled,
+    its open/idle/waiting counts.
+    """
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        entry = {
+            "vendor": connection.vendor,
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            "health_checks": connection.settings_dict["CONN_HEALTH_CHECKS"],
+            "connected": connection.connection is not None,
+            "pool": None,
+        }
+        # Only the PostgreSQL backend has a pool, and only when configured
+        if connection.settings_dict["OPTIONS"].get("pool"):
+            entry["pool"] = _pool_stats(connection.pool)
+        stats[alias] = entry
+    return stats
@@ -0,0 +1,83 @@
+from django.db.models import Case, Count, F, FloatField, Q, Sum, When
+from django.db.models.functions import Cast, Greatest
+
+from accounts.models import Profile
+
+RATING_VALUES = range(1, 6)
+
+
+def apply_rating(doctor_id, rating, delta=1):
+    """
+    Add (``delta=1``) or remove (``delta=-1``) one review of ``rating`` from
+    the doctor's denormalized aggregates in a single UPDATE.
+
+    The counters never go below zero (they are unsigned): removing a review
+    that was never counted, e.g. before the aggregates were backfilled,
+    leaves them at zero instead of failing. rebuild_ratings() corrects any
+    such drift.
+    """
+
+    def shifted(field, amount):
+        return Greatest(F(field) + amount, 0)
+
+    new_count = shifted("rating_count", delta)
+    new_sum = shifted("rating_sum", delta * rating)
+    rating_field = "rating_{}_count".format(rating)
+    Profile.objects.filter(user_id=doctor_id).update(
+        rating_count=new_count,
+        rating_sum=new_sum,
+        rating_average=Case(
+            When(
+                rating_count__gt=-delta,
+                then=Cast(new_sum, FloatField()) / new_count,
+            ),
+            default=0.0,
+            output_field=FloatField(),
+        ),
+        **{rating_field: shifted(rating_field, delta)},
+    )
+
+
+def rebuild_ratings(doctor_ids=None):
+    """
+    Recompute the aggregates of ``doctor_ids`` (all profiles when ``None``)
+    from the reviews table. Returns the number of profiles updated.
+    """
+    from core.models import Review
+
+    reviews = Review.objects.all()
+    profiles = Profile.objects.all()
+    if doctor_ids is not None:
+        reviews = reviews.filter(doctor_id__in=doctor_ids)
+        profiles = profiles.filter(user_id__in=doctor_ids)
+
+    stats = {
+        row.pop("doctor_id"): row
+        for row in reviews.values("doctor_id").annotate(
+            rating_count=Count("id"),
+            rating_sum=Sum("rating"),
+            **{
+                "rating_{}_count".format(i): Count("id", filter=Q(rating=i))
+                for i in RATING_VALUES
+            },
+        ).order_by()
+    }
+
+    changed = []
+    fields = ["rating_count", "rating_sum", "rating_average"] + [
+        "rating_{}_count".format(i) for i in RATING_VALUES
+    ]
+    for profile in profiles.only("id", "user_id", *fields).iterator():
+        row = stats.get(profile.user_id, {})
+        for field in fields:
+            if field != "rating_average":
+                setattr(profile, field, row.get(field, 0))
+        profile.rating_average = (
+            profile.rating_sum / profile.rating_count
+            if profile.rating_count
+            else 0
+        )
+        changed.append(profile)
+
+    Profile.objects.bulk_update(changed, fields, batch_size=500)
+    return len(changed)
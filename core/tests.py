@@ -1,3 +1,113 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+import pytest
+from django.utils import timezone
+
+from core.factories import DoctorFactory
+from core.jobs import dequeue, requeue_stale, run_job, run_pending, task
+from core.models import Job
+from core.ratings import apply_rating
+
+calls = []
+
+
+@task(max_attempts=2)
+def record(value, fail=False):
+    calls.append(value)
+    if fail:
+        raise RuntimeError("boom")
+
+
+@pytest.fixture(autouse=True)
+def _reset_calls():
+    calls.clear()
+
+
+def test_jobs_run_in_order_and_are_deleted(db):
+    record.defer(value=1)
+    record.defer(value=2)
+    later = record.defer(value=3, delay=60)
+
+    assert run_pending() == (2, 0)
+    assert calls == [1, 2]
+    assert list(Job.objects.values_list("pk", flat=True)) == [later.pk]
+
+
+def test_queued_jobs_with_the_same_key_are_merged(db):
+    record.defer(value=1, unique_key="key")
+    record.defer(value=2, unique_key="key")
+
+    run_pending()
+    assert calls == [1]
+    # Once claimed, a new job with the key is queued again
+    record.defer(value=3, unique_key="key")
+    assert len(dequeue()) == 1
+    record.defer(value=4, unique_key="key")
+    assert Job.objects.filter(status=Job.Status.QUEUED).count() == 1
+
+
+def test_failed_jobs_are_retried_with_backoff_then_kept(db):
+    job = record.defer(value=1, fail=True)
+
+    assert run_pending() == (0, 1)
+    job.refresh_from_db()
+    assert job.status == Job.Status.QUEUED
+    assert job.attempts == 1
+    assert job.run_at > timezone.now()
+    assert "boom" in job.last_error
+
+    Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+    assert run_pending() == (0, 1)
+    job.refresh_from_db()
+    assert job.status == Job.Status.FAILED
+    assert job.attempts == 2
+    assert not dequeue()
+
+
+def test_stale_running_jobs_are_requeued(db):
+    record.defer(value=1)
+    (job,) = dequeue()
+    Job.objects.filter(pk=job.pk).update(
+        locked_at=timezone.now() - timedelta(hours=1)
+    )
+
+    assert requeue_stale() == 1
+    (job,) = dequeue()
+    assert job.attempts == 2
+    assert run_job(job)
+    assert not Job.objects.exists()
+
+
+def test_a_retry_merges_into_a_job_queued_with_the_same_key(db):
+    record.defer(value=1, fail=True, unique_key="key")
+    (job,) = dequeue()
+    record.defer(value=2, unique_key="key")
+
+    assert not run_job(job)
+    assert list(Job.objects.values_list("kwargs", "status")) == [
+        ({"value": 2}, Job.Status.QUEUED)
+    ]
+
+
+def test_a_stale_job_merges_into_a_job_queued_with_the_same_key(db):
+    record.defer(value=1, unique_key="key")
+    (job,) = dequeue()
+    record.defer(value=2, unique_key="key")
+    Job.objects.filter(pk=job.pk).update(
+        locked_at=timezone.now() - timedelta(hours=1)
+    )
+
+    assert requeue_stale() == 0
+    assert Job.objects.get().kwargs == {"value": 2}
+
+
+def test_removing_an_uncounted_rating_stops_at_zero(db):
+    doctor = DoctorFactory()
+    apply_rating(doctor.id, 4, delta=-1)
+    apply_rating(doctor.id, 5)
+
+    profile = doctor.profile
+    profile.refresh_from_db()
+    assert (profile.rating_count, profile.rating_sum) == (1, 5)
+    assert profile.rating_4_count == 0
+    assert profile.rating_average == 5
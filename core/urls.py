@@ -1,5 +1,11 @@
 from django.urls import path
-from .views import home, TermsView, PrivacyView
+from .views import (
+    home,
+    TermsView,
+    PrivacyView,
+    database_stats,
+    request_metrics,
+)
 
 app_name = "core"
 
@@ -7,4 +13,6 @@ urlpatterns = [
     path("", home, name="home"),
     path("terms/", TermsView.as_view(), name="terms"),
     path("privacy/", PrivacyView.as_view(), name="privacy"),
+    path("monitoring/db/", database_stats, name="database-stats"),
+    path("monitoring/metrics/", request_metrics, name="request-metrics"),
 ]
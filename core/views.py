@@ -1,9 +1,13 @@
-from django.http import HttpResponse, HttpRequest
+from django.http import HttpResponse, HttpRequest, JsonResponse
 from django.shortcuts import render
+from django.views.decorators.cache import never_cache
 from django.views.generic import TemplateView
 
 from accounts.models import User
 
+from .instrumentation import registry
+from .monitoring import database_connection_stats, monitoring_allowed
+
 
 def home(request: HttpRequest) -> HttpResponse:
     doctors = (
@@ -20,3 +24,19 @@ class TermsView(TemplateView):
 
 class PrivacyView(TemplateView):
     template_name = "core/privacy.html"
+
+
+@never_cache
+def database_stats(request: HttpRequest) -> JsonResponse:
+    if not monitoring_allowed(request):
+        return JsonResponse({"detail": "Forbidden"}, status=403)
+    return JsonResponse({"databases": database_connection_stats()})
+
+
+@never_cache
+def request_metrics(request: HttpRequest) -> HttpResponse:
+    if not monitoring_allowed(request):
+        return HttpResponse("Forbidden", status=403, content_type="text/plain")
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4"
+    )
@@ -3,6 +3,7 @@ from .models import (
     Education,
     Experience,
     TimeRange,
+    WeeklyAvailability,
     Saturday,
     Sunday,
     Monday,
@@ -15,6 +16,7 @@ from .models import (
 admin.site.register(Education)
 admin.site.register(Experience)
 admin.site.register(TimeRange)
+
 admin.site.register(Saturday)
 admin.site.register(Sunday)
 admin.site.register(Monday)
@@ -22,3 +24,11 @@ admin.site.register(Tuesday)
 admin.site.register(Wednesday)
 admin.site.register(Thursday)
 admin.site.register(Friday)
+
+
+@admin.register(WeeklyAvailability)
+class WeeklyAvailabilityAdmin(admin.ModelAdmin):
+    list_display = ("doctor", "weekday", "start", "end", "slots_per_hour")
+    list_filter = ("weekday",)
+    list_select_related = ("doctor",)
+    raw_id_fields = ("doctor",)
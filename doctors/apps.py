@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class DoctorsConfig(AppConfig):
     name = "doctors"
+
+    def ready(self):
+        import doctors.signals
+        from doctors.search import ensure_search_indexes
+
+        post_migrate.connect(ensure_search_indexes, sender=self)
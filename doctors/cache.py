@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.cache import cache
+
+# Version keys never expire; bumping one orphans every cached entry built
+# from the previous version.
+VERSION_TIMEOUT = None
+
+
+def _version_key(doctor_id):
+    return f"doctor-profile-version:{doctor_id}"
+
+
+def get_profile_version(doctor_id):
+    version = cache.get(_version_key(doctor_id))
+    if version is None:
+        cache.add(_version_key(doctor_id), 1, VERSION_TIMEOUT)
+        version = cache.get(_version_key(doctor_id), 1)
+    return version
+
+
+def bump_profile_version(doctor_id):
+    """Invalidate everything cached for the doctor's public profile."""
+    try:
+        cache.incr(_version_key(doctor_id))
+    except ValueError:
+        # No version yet: nothing cached under the implicit version 1
+        cache.add(_version_key(doctor_id), 2, VERSION_TIMEOUT)
+
+
+def _object_key(doctor_id, version):
+    return f"doctor-profile:{doctor_id}:v{version}:object"
+
+
+def username_cache_key(username):
+    return f"doctor-profile-id:{username}"
+
+
+def get_cached_profile(username):
+    """Return ``(doctor, version)`` from the cache or ``(None, None)``."""
+    doctor_id = cache.get(username_cache_key(username))
+    if doctor_id is None:
+        return None, None
+    version = get_profile_version(doctor_id)
+    doctor = cache.get(_object_key(doctor_id, version))
+    # A stale username mapping (the doctor was renamed) is a miss
+    if doctor is None or doctor.username != username:
+        return None, None
+    return doctor, version
+
+
+def set_cached_profile(doctor):
+    """Cache a doctor loaded with its profile page relations prefetched."""
+    version = get_profile_version(doctor.id)
+    timeout = settings.DOCTOR_PROFILE_CACHE_TIMEOUT
+    cache.set_many(
+        {
+            username_cache_key(doctor.username): doctor.id,
+            _object_key(doctor.id, version): doctor,
+        },
+        timeout,
+    )
+    return version
@@ -0,0 +1,204 @@
+from collections import Counter
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, Q, Value, When
+
+from accounts.models import Profile
+
+
+def _format_price(amount):
+    return f"{amount:,} ₫"
+
+
+def build_price_buckets(bounds):
+    """
+    ``(key, label, lower bound, upper bound)`` for each bucket delimited by
+    ``bounds`` (in the consultation currency); the first has no lower
+    bound, the last no upper bound.
+    """
+    bounds = sorted(bounds)
+    buckets = []
+    for lower, upper in zip([None, *bounds], [*bounds, None]):
+        if lower is None:
+            key, label = f"under-{upper}", f"Under {_format_price(upper)}"
+        elif upper is None:
+            key, label = f"{lower}-plus", f"{_format_price(lower)} and over"
+        else:
+            key = f"{lower}-{upper}"
+            label = f"{_format_price(lower)} - {_format_price(upper)}"
+        buckets.append((key, label, lower, upper))
+    return buckets
+
+
+PRICE_BUCKETS = build_price_buckets(settings.DOCTOR_PRICE_BUCKET_BOUNDS)
+
+# Facet name (also the GET parameter) -> field on the doctor User queryset.
+# "price" is grouped on PRICE_BUCKETS instead of a field.
+FACET_FIELDS = {
+    "specialization": "profile__specialization",
+    "gender": "profile__gender",
+    "city": "profile__city",
+}
+FACETS = [*FACET_FIELDS, "price"]
+# Only the most common values of long-tailed facets are offered
+FACET_LIMITS = {"city": 10}
+
+GENDER_LABELS = dict(Profile._meta.get_field("gender").choices)
+PRICE_LABELS = {key: label for key, label, _, _ in PRICE_BUCKETS}
+
+UNFILTERED_CACHE_KEY = "doctor-facets:unfiltered"
+
+
+def _price_range(lower, upper):
+    q = Q()
+    if lower is not None:
+        q &= Q(profile__price_per_consultation__gte=lower)
+    if upper is not None:
+        q &= Q(profile__price_per_consultation__lt=upper)
+    return q
+
+
+def price_bucket_expression():
+    return Case(
+        *[
+            When(_price_range(lower, upper), then=Value(key))
+            for key, _, lower, upper in PRICE_BUCKETS
+        ],
+        default=Value(None),
+        output_field=CharField(),
+    )
+
+
+def parse_selection(params):
+    """
+    The facet values selected in ``params`` (request.GET), dropping values
+    that cannot match anything.
+    """
+    selected = {}
+    for facet in FACETS:
+        values = {value.strip()[:255] for value in params.getlist(facet)}
+        if facet == "gender":
+            values &= GENDER_LABELS.keys()
+        elif facet == "price":
+            values &= PRICE_LABELS.keys()
+        values.discard("")
+        if values:
+            selected[facet] = values
+    return selected
+
+
+def filter_queryset(queryset, selected):
+    """OR within a facet, AND across facets."""
+    for facet, values in selected.items():
+        if facet == "price":
+            q = Q()
+            for key, _, lower, upper in PRICE_BUCKETS:
+                if key in values:
+                    q |= _price_range(lower, upper)
+            queryset = queryset.filter(q)
+        else:
+            queryset = queryset.filter(**{f"{FACET_FIELDS[facet]}__in": values})
+    return queryset
+
+
+def facet_rows(queryset):
+    """
+    Doctor counts per (specialization, gender, city, price bucket)
+    combination in one GROUP BY. There are at most a few thousand
+    combinations whatever the number of doctors, and every facet count for
+    any selection can be summed from them.
+    """
+    rows = (
+        queryset.order_by()
+        .values(*FACET_FIELDS.values())
+        .annotate(price_bucket=price_bucket_expression(), doctors=Count("pk"))
+        .values_list(*FACET_FIELDS.values(), "price_bucket", "doctors")
+    )
+    return [(tuple(row[:-1]), row[-1]) for row in rows]
+
+
+def unfiltered_facet_rows(queryset):
+    """facet_rows() of the whole directory, cached until a Profile changes."""
+    rows = cache.get(UNFILTERED_CACHE_KEY)
+    if rows is None:
+        rows = facet_rows(queryset)
+        cache.set(UNFILTERED_CACHE_KEY, rows, settings.DOCTOR_FACETS_CACHE_TIMEOUT)
+    return rows
+
+
+def invalidate_facets():
+    cache.delete(UNFILTERED_CACHE_KEY)
+
+
+@dataclass
+class FacetOption:
+    value: str
+    label: str
+    count: int
+    selected: bool
+
+
+@dataclass
+class Facets:
+    count: int
+    options: dict
+
+    def __getitem__(self, facet):
+        return self.options[facet]
+
+
+def count_facets(rows, selected):
+    """
+    The number of doctors matching ``selected`` and, for each facet, the
+    options with their counts under the other facets' selections (so
+    ticking a second specialization still shows how many it would add).
+    """
+
+    def matches(combination, skip=None):
+        return all(
+            combination[FACETS.index(facet)] in values
+            for facet, values in selected.items()
+            if facet != skip
+        )
+
+    total = sum(doctors for combination, doctors in rows if matches(combination))
+    options = {}
+    for index, facet in enumerate(FACETS):
+        counts = Counter()
+        for combination, doctors in rows:
+            if combination[index] and matches(combination, skip=facet):
+                counts[combination[index]] += doctors
+        chosen = selected.get(facet, set())
+        # Keep selected values visible even when nothing matches them
+        for value in chosen - counts.keys():
+            counts[value] = 0
+        if facet == "price":
+            values = [key for key in PRICE_LABELS if key in counts]
+            labels = PRICE_LABELS
+        else:
+            values = counts.keys()
+            if facet in FACET_LIMITS:
+                values = {
+                    value for value, _ in counts.most_common(FACET_LIMITS[facet])
+                } | chosen
+            values = sorted(values)
+            labels = GENDER_LABELS if facet == "gender" else {}
+        options[facet] = [
+            FacetOption(
+                value, labels.get(value, value), counts[value], value in chosen
+            )
+            for value in values
+        ]
+    return Facets(total, options)
+
+
+def directory_facets(queryset, selected, searched=False):
+    """
+    Facets for the doctor directory. ``queryset`` is the directory before
+    the facet filters (after the text search, if ``searched``); only the
+    unsearched directory is shared enough to be worth caching.
+    """
+    rows = facet_rows(queryset) if searched else unfiltered_facet_rows(queryset)
+    return count_facets(rows, selected)
@@ -0,0 +1,84 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from doctors.cache import bump_profile_version
+from doctors.models import (
+    Friday,
+    Monday,
+    Saturday,
+    Sunday,
+    Thursday,
+    Tuesday,
+    Wednesday,
+    WeeklyAvailability,
+)
+
+LEGACY_DAY_MODELS = {
+    Monday: WeeklyAvailability.Weekday.MONDAY,
+    Tuesday: WeeklyAvailability.Weekday.TUESDAY,
+    Wednesday: WeeklyAvailability.Weekday.WEDNESDAY,
+    Thursday: WeeklyAvailability.Weekday.THURSDAY,
+    Friday: WeeklyAvailability.Weekday.FRIDAY,
+    Saturday: WeeklyAvailability.Weekday.SATURDAY,
+    Sunday: WeeklyAvailability.Weekday.SUNDAY,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the legacy per-day schedules (Saturday..Friday + TimeRange) "
+        "into WeeklyAvailability"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Drop existing WeeklyAvailability rows of migrated doctors first",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        ranges = []
+        doctor_ids = set()
+        for day_model, weekday in LEGACY_DAY_MODELS.items():
+            through = day_model.time_range.through
+            # One query per day through the M2M table
+            rows = through.objects.values_list(
+                f"{day_model._meta.model_name}__user_id",
+                "timerange__start",
+                "timerange__end",
+                "timerange__slots_per_hour",
+            )
+            for doctor_id, start, end, slots_per_hour in rows:
+                doctor_ids.add(doctor_id)
+                ranges.append(
+                    WeeklyAvailability(
+                        doctor_id=doctor_id,
+                        weekday=weekday,
+                        start=start,
+                        end=end,
+                        slots_per_hour=slots_per_hour,
+                    )
+                )
+
+        with transaction.atomic():
+            if options["replace"]:
+                WeeklyAvailability.objects.filter(
+                    doctor_id__in=doctor_ids
+                ).delete()
+            # After the --replace deletion, so only new rows are counted
+            existing = WeeklyAvailability.objects.count()
+            # ignore_conflicts: ranges copied by a previous run are skipped
+            WeeklyAvailability.objects.bulk_create(
+                ranges, batch_size=options["batch_size"], ignore_conflicts=True
+            )
+            created = WeeklyAvailability.objects.count() - existing
+
+        for doctor_id in doctor_ids:
+            bump_profile_version(doctor_id)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Copied {created} time ranges for {len(doctor_ids)} doctors"
+            )
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import Profile
+from doctors.search import build_search_document, ensure_search_indexes
+
+
+class Command(BaseCommand):
+    help = "Rebuild the doctor search documents and PostgreSQL search indexes"
+
+    def handle(self, *args, **options):
+        changed = []
+        for profile in Profile.objects.select_related("user").iterator(
+            chunk_size=1000
+        ):
+            document = build_search_document(profile.user, profile)
+            if document != profile.search_document:
+                profile.search_document = document
+                changed.append(profile)
+
+        Profile.objects.bulk_update(
+            changed, ["search_document"], batch_size=1000
+        )
+        ensure_search_indexes()
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated {len(changed)} search documents")
+        )
@@ -5,9 +5,11 @@ __all__ = [
     "Education",
     "Experience",
     "TimeRange",
+    "WeeklyAvailability",
     "Saturday",
     "Sunday",
     "Monday",
+    "Tuesday",
     "Wednesday",
     "Thursday",
     "Friday",
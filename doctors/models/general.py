@@ -1,13 +1,12 @@
 from datetime import timedelta
-from django.db import models
+from django.db import models, transaction
 
 from accounts.models import User
 
 
-class TimeRange(models.Model):
+class BaseTimeRange(models.Model):
     start = models.TimeField()
     end = models.TimeField()
-    is_active = models.BooleanField(default=True)
     slots_per_hour = models.PositiveIntegerField(default=4)
 
     def get_slot_duration(self):
@@ -55,10 +54,78 @@ class TimeRange(models.Model):
         
         return slots
 
+    class Meta:
+        abstract = True
+
+
+class TimeRange(BaseTimeRange):
+    """
+    Legacy shared time range, linked to doctors through the Saturday..Friday
+    day models. Superseded by WeeklyAvailability; kept so existing schedules
+    can be copied with `manage.py migrate_weekly_schedules`.
+    """
+
+    is_active = models.BooleanField(default=True)
+
     class Meta:
         unique_together = ("start", "end")
 
 
+class WeeklyAvailability(BaseTimeRange):
+    """
+    One working-hours range of a doctor's weekly schedule.
+    """
+
+    class Weekday(models.IntegerChoices):
+        # Same numbering as date.weekday()
+        MONDAY = 0, "Monday"
+        TUESDAY = 1, "Tuesday"
+        WEDNESDAY = 2, "Wednesday"
+        THURSDAY = 3, "Thursday"
+        FRIDAY = 4, "Friday"
+        SATURDAY = 5, "Saturday"
+        SUNDAY = 6, "Sunday"
+
+    doctor = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="weekly_availability"
+    )
+    weekday = models.PositiveSmallIntegerField(choices=Weekday.choices)
+
+    class Meta:
+        verbose_name = "Weekly availability"
+        verbose_name_plural = "Weekly availability"
+        ordering = ["weekday", "start"]
+        indexes = [
+            models.Index(fields=["doctor", "weekday", "start"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["doctor", "weekday", "start", "end"],
+                name="unique_weekly_availability_range",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.doctor} -> {self.get_weekday_display()} {self.start}-{self.end}"
+
+    @classmethod
+    @transaction.atomic
+    def replace_for_doctor(cls, doctor, ranges):
+        """
+        Replace the doctor's whole weekly schedule with ``ranges`` (unsaved
+        instances) using one DELETE and one bulk INSERT. No signals are
+        sent: the caller invalidates the cached profile once.
+        """
+        existing = cls.objects.filter(doctor=doctor)
+        # Nothing references these rows, but the post_delete receiver would
+        # make delete() select them and send one signal per row
+        existing._raw_delete(using=existing.db)
+        return cls.objects.bulk_create(ranges, ignore_conflicts=True)
+
+
+# Legacy per-day schedule models, see TimeRange
+
+
 class Saturday(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     time_range = models.ManyToManyField(TimeRange)
@@ -0,0 +1,181 @@
+import logging
+import re
+import threading
+import unicodedata
+
+from django.db import connection, connections
+from django.db.models import Case, FloatField, Q, Value, When
+
+logger = logging.getLogger(__name__)
+
+POSTGRES_INDEX_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # Must match the expression emitted by SearchVector("...", config="simple")
+    "CREATE INDEX IF NOT EXISTS accounts_profile_search_tsv_idx "
+    "ON accounts_profile USING gin "
+    "(to_tsvector('simple'::regconfig, COALESCE((search_document)::text, '')))",
+    "CREATE INDEX IF NOT EXISTS accounts_profile_search_trgm_idx "
+    "ON accounts_profile USING gin (search_document gin_trgm_ops)",
+]
+
+
+def normalize(text):
+    """
+    Lowercase ``text`` and strip accents, so "Nguyễn Đức" matches "nguyen duc".
+    """
+    if not text:
+        return ""
+    # "đ" is a separate letter, not a "d" with a combining mark
+    text = text.replace("đ", "d").replace("Đ", "D")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+def tokenize(text):
+    return normalize(text).split()
+
+
+def build_search_document(user, profile):
+    """Return the normalized text that doctor search matches against."""
+    return normalize(
+        " ".join(
+            filter(
+                None,
+                [
+                    user.first_name,
+                    user.last_name,
+                    profile.specialization,
+                    profile.city,
+                ],
+            )
+        )
+    )
+
+
+class InMemorySearchIndex:
+    """
+    Per-process prefix index over doctor search documents.
+
+    Used instead of PostgreSQL full-text search on other backends (SQLite test
+    runs). Invalidated by the doctors.signals receivers.
+    """
+
+    def __init__(self):
+        self._documents = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._documents = None
+
+    def _get_documents(self):
+        documents = self._documents
+        if documents is None:
+            from accounts.models import Profile, User
+
+            with self._lock:
+                documents = {
+                    user_id: tuple(document.split())
+                    for user_id, document in Profile.objects.filter(
+                        user__role=User.RoleChoices.DOCTOR
+                    ).values_list("user_id", "search_document")
+                }
+                self._documents = documents
+        return documents
+
+    def rank(self, terms):
+        """
+        Return ``{user_id: score}`` for documents matching every term. Whole
+        word matches score higher than prefix matches.
+        """
+        scores = {}
+        for user_id, words in self._get_documents().items():
+            score = 0.0
+            for term in terms:
+                if term in words:
+                    score += 1.0
+                elif any(word.startswith(term) for word in words):
+                    score += 0.5
+                else:
+                    break
+            else:
+                scores[user_id] = score / len(terms)
+        return scores
+
+    def search(self, queryset, terms):
+        scores = self.rank(terms)
+        if not scores:
+            return queryset.none().annotate(
+                search_rank=Value(0.0, output_field=FloatField())
+            )
+        return queryset.filter(pk__in=scores).annotate(
+            search_rank=Case(
+                *[
+                    When(pk=user_id, then=Value(score))
+                    for user_id, score in scores.items()
+                ],
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        )
+
+
+fallback_index = InMemorySearchIndex()
+
+
+def _postgres_search(queryset, terms):
+    from django.contrib.postgres.search import (
+        SearchQuery,
+        SearchRank,
+        SearchVector,
+        TrigramWordSimilarity,
+    )
+
+    vector = SearchVector("profile__search_document", config="simple")
+    # Terms are \w+ only, so they are safe inside a raw tsquery
+    query = SearchQuery(
+        " & ".join(f"{term}:*" for term in terms),
+        config="simple",
+        search_type="raw",
+    )
+    text = " ".join(terms)
+    return (
+        queryset.annotate(search=vector)
+        .filter(
+            # Full-text prefix match, or a fuzzy (typo-tolerant) match above
+            # pg_trgm.word_similarity_threshold
+            Q(search=query)
+            | Q(profile__search_document__trigram_word_similar=text)
+        )
+        .annotate(
+            search_rank=SearchRank(vector, query)
+            + TrigramWordSimilarity(text, "profile__search_document")
+        )
+    )
+
+
+def search_doctors(queryset, query):
+    """
+    Filter a doctor ``User`` queryset by ``query`` and annotate it with
+    ``search_rank`` (higher is better).
+    """
+    terms = tokenize(query)
+    if not terms:
+        return queryset
+    if connection.vendor == "postgresql":
+        return _postgres_search(queryset, terms)
+    return fallback_index.search(queryset, terms)
+
+
+def ensure_search_indexes(using=None, **kwargs):
+    """Create the PostgreSQL search indexes (post_migrate receiver)."""
+    conn = connections[using or "default"]
+    if conn.vendor != "postgresql":
+        return
+    with conn.cursor() as cursor:
+        for sql in POSTGRES_INDEX_SQL:
+            try:
+                cursor.execute(sql)
+            except Exception as e:
+                logger.warning(f"Could not create search index: {str(e)}")
+                return
@@ -1,19 +1,92 @@
+from django.db import transaction
 from rest_framework import serializers
 
 from accounts.models import User
 from doctors.models import Education, Experience
 
 
+class BulkUpsertListSerializer(serializers.ListSerializer):
+    """
+    Validate all submitted rows together and write them back in bulk.
+
+    Rows with an ``id`` update the matching object of
+    ``context["queryset"]`` (fetched with one ``id__in`` query), rows
+    without one are created. ``save()`` issues one ``bulk_update`` and one
+    ``bulk_create`` inside a transaction. Bulk writes skip model signals.
+    """
+
+    def to_internal_value(self, data):
+        rows = super().to_internal_value(data)
+
+        ids = [row["id"] for row in rows if row.get("id") is not None]
+        self.existing = self.context["queryset"].in_bulk(ids)
+
+        errors = [
+            {"id": ["Not found."]}
+            if row.get("id") is not None and row["id"] not in self.existing
+            else {}
+            for row in rows
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return rows
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        to_update, to_create = [], []
+        update_fields = set()
+
+        for attrs in validated_data:
+            pk = attrs.pop("id", None)
+            if pk is None:
+                to_create.append(model(**attrs))
+                continue
+            instance = self.existing[pk]
+            for field, value in attrs.items():
+                setattr(instance, field, value)
+            update_fields.update(attrs)
+            to_update.append(instance)
+
+        with transaction.atomic():
+            if to_update:
+                model.objects.bulk_update(to_update, sorted(update_fields))
+            created = model.objects.bulk_create(to_create)
+        return to_update + created
+
+    def row_errors(self, label):
+        """Flatten ``errors`` into one message per invalid row."""
+        errors = self.errors
+        if not isinstance(errors, list):
+            errors = [errors]
+
+        messages = []
+        for index, row_errors in enumerate(errors, start=1):
+            if not row_errors:
+                continue
+            details = "; ".join(
+                f"{field}: {' '.join(str(error) for error in field_errors)}"
+                for field, field_errors in row_errors.items()
+            )
+            messages.append(f"Error in {label} {index}: {details}")
+        return messages
+
+
 class EducationSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False, allow_null=True)
+
     class Meta:
         model = Education
         fields = ["id", "college", "degree", "year_of_completion"]
+        list_serializer_class = BulkUpsertListSerializer
 
 
 class ExperienceSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False, allow_null=True)
+
     class Meta:
         model = Experience
         fields = ["id", "institution", "from_year", "to_year", "designation"]
+        list_serializer_class = BulkUpsertListSerializer
 
 
 class RegistrationNumberSerializer(serializers.ModelSerializer):
@@ -0,0 +1,109 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from accounts.models import Profile, User
+from core.models import Review
+from doctors.cache import bump_profile_version
+from doctors.facets import invalidate_facets
+from doctors.models import Education, Experience, WeeklyAvailability
+from doctors.search import build_search_document, fallback_index
+
+
+@receiver(pre_save, sender=Profile)
+def update_search_document(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance.search_document = build_search_document(instance.user, instance)
+
+
+@receiver(post_save, sender=User)
+def update_search_document_for_user(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    if raw or created:
+        return
+    # e.g. the last_login update on every login
+    if update_fields and not {"first_name", "last_name"} & set(update_fields):
+        return
+    profile = getattr(instance, "profile", None)
+    if profile is None:
+        return
+    document = build_search_document(instance, profile)
+    if document != profile.search_document:
+        Profile.objects.filter(pk=profile.pk).update(search_document=document)
+        profile.search_document = document
+        fallback_index.invalidate()
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_fallback_index(sender, **kwargs):
+    fallback_index.invalidate()
+
+
+# Directory facet counts (see doctors.facets)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_directory_facets(sender, **kwargs):
+    invalidate_facets()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_directory_facets_for_user(
+    sender, instance, update_fields=None, **kwargs
+):
+    # Activating, deactivating or deleting a doctor changes the directory
+    if instance.role != User.RoleChoices.DOCTOR:
+        return
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    invalidate_facets()
+
+
+# Public profile cache invalidation (see doctors.cache)
+
+
+@receiver(post_save, sender=User)
+def invalidate_profile_cache_for_user(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    if raw or created or instance.role != User.RoleChoices.DOCTOR:
+        return
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    bump_profile_version(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+@receiver(post_save, sender=Education)
+@receiver(post_delete, sender=Education)
+@receiver(post_save, sender=Experience)
+@receiver(post_delete, sender=Experience)
+def invalidate_profile_cache(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    bump_profile_version(instance.user_id)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_profile_cache_for_review(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    bump_profile_version(instance.doctor_id)
+
+
+# schedule_timings replaces the schedule in bulk and bumps explicitly; these
+# cover single-row edits (e.g. from the admin)
+@receiver(post_save, sender=WeeklyAvailability)
+@receiver(post_delete, sender=WeeklyAvailability)
+def invalidate_profile_cache_for_availability(
+    sender, instance, raw=False, **kwargs
+):
+    if raw:
+        return
+    bump_profile_version(instance.doctor_id)
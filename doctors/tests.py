@@ -1,3 +1,83 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.factories import DoctorFactory
+
+# Query budgets: the number of queries each page may run. They must not
+# depend on how many doctors, bookings or reviews exist (see conftest.py).
+
+
+def test_doctors_list_queries(query_budget):
+    query_budget(reverse("doctors:list"), 2)
+
+
+def test_doctors_list_filtered_queries(query_budget):
+    query_budget(
+        reverse("doctors:list")
+        + "?specialization=Cardiology&gender=female&price=300000-500000&sort=rating",
+        2,
+    )
+
+
+def test_doctor_profile_queries(query_budget, clinic):
+    query_budget(
+        reverse("doctors:doctor-profile", args=[clinic.doctor.username]), 7
+    )
+
+
+def test_doctor_dashboard_queries(query_budget, clinic):
+    query_budget(reverse("doctors:dashboard"), 7, user=clinic.doctor)
+
+
+def test_doctor_appointments_queries(query_budget, clinic):
+    query_budget(reverse("doctors:appointments"), 3, user=clinic.doctor)
+
+
+# Directory facets
+
+
+def facet_counts(client, query=""):
+    facets = client.get(reverse("doctors:list") + query).context["facets"]
+    counts = {
+        facet: {option.value: option.count for option in facets[facet]}
+        for facet in ("specialization", "gender", "price")
+    }
+    return facets.count, counts
+
+
+def test_facet_counts_ignore_their_own_filter(client, db):
+    for specialization, gender, price in [
+        ("Cardiology", "female", 250000),
+        ("Cardiology", "male", 400000),
+        ("Neurology", "female", 400000),
+    ]:
+        DoctorFactory(
+            profile__specialization=specialization,
+            profile__gender=gender,
+            profile__price_per_consultation=price,
+        )
+
+    total, counts = facet_counts(client, "?specialization=Cardiology&gender=female")
+
+    assert total == 1
+    # Specializations under the gender filter only, and the reverse
+    assert counts["specialization"] == {"Cardiology": 1, "Neurology": 1}
+    assert counts["gender"] == {"female": 1, "male": 1}
+    # Price under both filters
+    assert counts["price"] == {"under-300000": 1}
+
+
+def test_cached_facet_counts_follow_profile_changes(client, db):
+    doctor = DoctorFactory(profile__specialization="Cardiology")
+    assert facet_counts(client)[1]["specialization"] == {"Cardiology": 1}
+
+    doctor.profile.specialization = "Neurology"
+    doctor.profile.save()
+    DoctorFactory(profile__specialization="Pediatrics")
+    assert facet_counts(client)[1]["specialization"] == {
+        "Neurology": 1,
+        "Pediatrics": 1,
+    }
+
+    doctor.is_active = False
+    doctor.save()
+    assert facet_counts(client)[0] == 1
@@ -1,6 +1,8 @@
 import json
 from datetime import datetime
+from decimal import Decimal
 
+from django.conf import settings
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.http import (
@@ -23,18 +25,35 @@ from django.views.generic.base import TemplateView
 from rest_framework.generics import UpdateAPIView
 from rest_framework.response import Response
 from django.db.models import Q
-from django.db.models import Count
+from django.db.models import (
+    Count,
+    F,
+    Max,
+    Min,
+    OuterRef,
+    Prefetch,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.contrib import messages
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.mixins import LoginRequiredMixin
 
 from bookings.models import Booking, Prescription
-from core.models import Review
 from core.decorators import user_is_doctor
+from core.models import Review
+from doctors.cache import (
+    bump_profile_version,
+    get_cached_profile,
+    set_cached_profile,
+)
+from doctors.facets import directory_facets, filter_queryset, parse_selection
 from doctors.forms import DoctorProfileForm, PrescriptionForm
 from doctors.models import Experience
 from doctors.models.general import *
+from doctors.search import search_doctors
 from doctors.serializers import (
     EducationSerializer,
     ExperienceSerializer,
@@ -44,9 +63,9 @@ from doctors.serializers import (
 from mixins.custom_mixins import DoctorRequiredMixin
 from patients.forms import ChangePasswordForm
 from utils.htmx import render_toast_message_for_api
+from utils.pagination import CursorPaginationMixin
 from accounts.models import User
 from django.db import transaction
-from django.db.models import Prefetch
 import logging
 import re
 
@@ -54,15 +73,37 @@ import re
 logger = logging.getLogger(__name__)
 
 
-days = {
-    0: Sunday,
-    1: Monday,
-    2: Tuesday,
-    3: Wednesday,
-    4: Thursday,
-    5: Friday,
-    6: Saturday,
-}
+# What the public profile shows of each review and its author
+PROFILE_REVIEW_FIELDS = (
+    "doctor",
+    "rating",
+    "review",
+    "created_at",
+    "patient__first_name",
+    "patient__last_name",
+    "patient__profile__avatar",
+    "patient__profile__avatar_exists",
+    "patient__profile__avatar_thumbnails",
+)
+
+# Schedule form/profile order (Sunday first) mapped to WeeklyAvailability.weekday
+SCHEDULE_WEEKDAYS = (
+    WeeklyAvailability.Weekday.SUNDAY,
+    WeeklyAvailability.Weekday.MONDAY,
+    WeeklyAvailability.Weekday.TUESDAY,
+    WeeklyAvailability.Weekday.WEDNESDAY,
+    WeeklyAvailability.Weekday.THURSDAY,
+    WeeklyAvailability.Weekday.FRIDAY,
+    WeeklyAvailability.Weekday.SATURDAY,
+)
+
+
+def group_by_schedule_day(ranges):
+    """Group WeeklyAvailability rows into Sunday-first lists."""
+    grouped = {weekday: [] for weekday in SCHEDULE_WEEKDAYS}
+    for time_range in ranges:
+        grouped[time_range.weekday].append(time_range)
+    return [(weekday, grouped[weekday]) for weekday in SCHEDULE_WEEKDAYS]
 
 
 class DoctorDashboardView(DoctorRequiredMixin, TemplateView):
@@ -120,30 +161,44 @@ def convert_to_24_hour_format(time_str):
 def schedule_timings(request: HttpRequest) -> HttpResponse:
     if request.method == "POST":
         data = request.POST
-        for i in range(7):
-            if data.get(f"day_{i}", None):
-                start_times = data.getlist(f"start_time_{i}", default=[])
-                end_times = data.getlist(f"end_time_{i}", default=[])
-                for index in range(len(start_times)):
-                    start = convert_to_24_hour_format(start_times[index])
-                    end = convert_to_24_hour_format(end_times[index])
-                    time_range, time_created = TimeRange.objects.get_or_create(
-                        start=start, end=end
+        ranges = []
+        for i, weekday in enumerate(SCHEDULE_WEEKDAYS):
+            if not data.get(f"day_{i}", None):
+                continue
+            start_times = data.getlist(f"start_time_{i}", default=[])
+            end_times = data.getlist(f"end_time_{i}", default=[])
+            for start, end in zip(start_times, end_times):
+                if not start or not end:
+                    continue
+                ranges.append(
+                    WeeklyAvailability(
+                        doctor=request.user,
+                        weekday=weekday,
+                        start=convert_to_24_hour_format(start),
+                        end=convert_to_24_hour_format(end),
                     )
-                    day, created = days[i].objects.get_or_create(
-                        user=request.user
-                    )
-                    ranges = day.time_range
-                    if time_range.id not in list(
-                        ranges.values_list("id", flat=True)
-                    ):
-                        day.time_range.add(time_range)
+                )
+
+        # ✅ One DELETE + one bulk INSERT; bulk ops skip signals, so
+        # invalidate the cached public profile explicitly
+        WeeklyAvailability.replace_for_doctor(request.user, ranges)
+        bump_profile_version(request.user.id)
 
         return HttpResponsePermanentRedirect(
             reverse_lazy("doctors:schedule-timings")
         )
 
-    return render(request, "doctors/schedule-timings.html")
+    schedule_days = [
+        {"index": index, "label": weekday.label, "ranges": day_ranges}
+        for index, (weekday, day_ranges) in enumerate(
+            group_by_schedule_day(request.user.weekly_availability.all())
+        )
+    ]
+    return render(
+        request,
+        "doctors/schedule-timings.html",
+        {"schedule_days": schedule_days},
+    )
 
 
 class DoctorProfileUpdateView(DoctorRequiredMixin, generic.UpdateView):
@@ -163,23 +218,32 @@ class DoctorProfileView(DetailView):
     template_name = "doctors/profile.html"
 
     def get_object(self, queryset=None):
+        slug = self.kwargs.get(self.slug_url_kwarg)
+
+        obj, self.profile_version = get_cached_profile(slug)
+        if obj is not None:
+            return obj
+
         if queryset is None:
             queryset = self.get_queryset()
 
-        slug = self.kwargs.get(self.slug_url_kwarg)
-        
-        # ✅ OPTIMIZED: Single query with select_related and prefetch_related
-        queryset = queryset.select_related("profile").prefetch_related(
-            "educations",
-            "experiences",
-            "reviews_received__patient__profile",  # ✅ ADD THIS
-            "sunday__time_range",
-            "monday__time_range",
-            "tuesday__time_range",
-            "wednesday__time_range",
-            "thursday__time_range",
-            "friday__time_range",
-            "saturday__time_range",
+        # ✅ OPTIMIZED: Single query with select_related and prefetch_related.
+        # The result is pickled into the shared cache, so load only what the
+        # page renders: no password hash, no reviewers' private details
+        queryset = (
+            queryset.select_related("profile")
+            .defer("password", "last_login")
+            .prefetch_related(
+                "educations",
+                "experiences",
+                Prefetch(
+                    "reviews_received",
+                    queryset=Review.objects.select_related(
+                        "patient__profile"
+                    ).only(*PROFILE_REVIEW_FIELDS),
+                ),
+                "weekly_availability",
+            )
         )
 
         try:
@@ -189,6 +253,7 @@ class DoctorProfileView(DetailView):
         except User.DoesNotExist:
             raise Http404(f"No doctor found matching the username")
 
+        self.profile_version = set_cached_profile(obj)
         return obj
 
     def get_context_data(self, **kwargs):
@@ -200,56 +265,46 @@ class DoctorProfileView(DetailView):
 
         # Prepare business hours
         business_hours = {
-            "Sunday": (
-                doctor.sunday.time_range.all()
-                if hasattr(doctor, "sunday")
-                else []
-            ),
-            "Monday": (
-                doctor.monday.time_range.all()
-                if hasattr(doctor, "monday")
-                else []
-            ),
-            "Tuesday": (
-                doctor.tuesday.time_range.all()
-                if hasattr(doctor, "tuesday")
-                else []
-            ),
-            "Wednesday": (
-                doctor.wednesday.time_range.all()
-                if hasattr(doctor, "wednesday")
-                else []
-            ),
-            "Thursday": (
-                doctor.thursday.time_range.all()
-                if hasattr(doctor, "thursday")
-                else []
-            ),
-            "Friday": (
-                doctor.friday.time_range.all()
-                if hasattr(doctor, "friday")
-                else []
-            ),
-            "Saturday": (
-                doctor.saturday.time_range.all()
-                if hasattr(doctor, "saturday")
-                else []
-            ),
+            weekday.label: day_ranges
+            for weekday, day_ranges in group_by_schedule_day(
+                doctor.weekly_availability.all()
+            )
         }
 
         context.update(
             {
                 "current_day": current_day,
                 "business_hours": business_hours,
-                "reviews": doctor.reviews_received.select_related(
-                    "patient", "patient__profile"
-                ).order_by("-created_at"),
+                "reviews": doctor.reviews_received.all(),
+                "profile_version": self.profile_version,
+                "profile_cache_timeout": settings.DOCTOR_PROFILE_CACHE_TIMEOUT,
             }
         )
 
         return context
 
 
+def get_form_rows(data, fields, nullable=()):
+    """
+    Zip the repeated inputs of an HTMX formset into one dict per row.
+
+    The first field drives the row count; blank ``nullable`` inputs become
+    ``None`` (e.g. the empty ``id`` of a newly added row).
+    """
+    columns = {field: data.getlist(field, default=[]) for field in fields}
+    rows = []
+    for i in range(len(columns[fields[0]])):
+        row = {}
+        for field in fields:
+            values = columns[field]
+            value = values[i] if i < len(values) else None
+            if field in nullable and value == "":
+                value = None
+            row[field] = value
+        rows.append(row)
+    return rows
+
+
 class UpdateEducationAPIView(DoctorRequiredMixin, UpdateAPIView):
     queryset = Experience.objects.all()
     serializer_class = EducationSerializer
@@ -257,56 +312,31 @@ class UpdateEducationAPIView(DoctorRequiredMixin, UpdateAPIView):
     def get_object(self):
         return self.request.user
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["queryset"] = self.request.user.educations.all()
+        return context
+
     def perform_update(self, serializer):
         serializer.save(user_id=self.request.user.id)
 
     @transaction.atomic  # ✅ ADD THIS
     def update(self, request, *args, **kwargs):
-        data = request.POST
-        ids = data.getlist("id", default=[])
-        degrees = data.getlist("degree", default=[])
-        colleges = data.getlist("college", default=[])
-        years = data.getlist("year_of_completion", default=[])
-        
-        errors = []
-        
-        for i in range(len(degrees)):
-            try:
-                if i < len(ids) and ids[i]:
-                    # Update existing
-                    try:
-                        instance = self.request.user.educations.get(id=ids[i])
-                        serializer = self.get_serializer(
-                            instance,
-                            data={
-                                "degree": degrees[i],
-                                "college": colleges[i],
-                                "year_of_completion": years[i] if i < len(years) else None,
-                            },
-                            partial=True,
-                        )
-                        serializer.is_valid(raise_exception=True)
-                        self.perform_update(serializer)
-                    except Exception as e:
-                        errors.append(f"Error updating education {i+1}: {str(e)}")
-                else:
-                    # Create new
-                    serializer = self.get_serializer(
-                        data={
-                            "degree": degrees[i],
-                            "college": colleges[i],
-                            "year_of_completion": years[i] if i < len(years) else None,
-                        }
-                    )
-                    serializer.is_valid(raise_exception=True)
-                    self.perform_update(serializer)
-            except Exception as e:
-                errors.append(f"Error processing education {i+1}: {str(e)}")
+        rows = get_form_rows(
+            request.POST,
+            ("degree", "college", "year_of_completion", "id"),
+            nullable=("year_of_completion", "id"),
+        )
 
-        if errors:
+        # ✅ Validate all rows at once, then one bulk_update + one bulk_create
+        serializer = self.get_serializer(data=rows, many=True)
+        if not serializer.is_valid():
             return render_toast_message_for_api(
-                "Education", "; ".join(errors), "error"
+                "Education", "; ".join(serializer.row_errors("education")), "error"
             )
+        self.perform_update(serializer)
+        # Bulk writes skip the post_save cache invalidation
+        bump_profile_version(request.user.id)
 
         return render_toast_message_for_api(
             "Education", "Updated successfully", "success"
@@ -320,68 +350,34 @@ class UpdateExperienceAPIView(DoctorRequiredMixin, UpdateAPIView):
     def get_object(self):
         return self.request.user
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["queryset"] = self.request.user.experiences.all()
+        return context
+
     def perform_update(self, serializer):
         serializer.save(user_id=self.request.user.id)
 
     @transaction.atomic  # ✅ Added transaction
     def update(self, request, *args, **kwargs):
-        data = request.POST
-        
-        # Get all lists from the form data
-        ids = data.getlist("id", default=[])
-        institutions = data.getlist("institution", default=[])
-        from_years = data.getlist("from_year", default=[])
-        to_years = data.getlist("to_year", default=[])
-        designations = data.getlist("designation", default=[])
-
-        errors = []  # ✅ List to collect errors
-
-        # Loop based on the main field, 'institutions'
-        for i in range(len(institutions)):
-            try:
-                # Consolidate data for this item
-                experience_data = {
-                    "institution": institutions[i],
-                    # Add safety checks
-                    "from_year": from_years[i] if i < len(from_years) else None,
-                    "to_year": to_years[i] if i < len(to_years) else None,
-                    "designation": designations[i] if i < len(designations) else None,
-                }
-
-                # ✅ Check if a valid ID was provided to decide between update/create
-                if i < len(ids) and ids[i]:
-                    # This is an UPDATE
-                    try:
-                        instance = self.request.user.experiences.get(id=ids[i])
-                        serializer = self.get_serializer(
-                            instance,
-                            data=experience_data,
-                            partial=True,
-                        )
-                        serializer.is_valid(raise_exception=True)
-                        self.perform_update(serializer)
-                    except Exception as e:
-                        # ✅ Catch error for this specific item
-                        logger.error(f"Error updating experience {ids[i]}: {str(e)}")
-                        errors.append(f"Error updating experience {i+1}: {str(e)}")
-                else:
-                    # This is a CREATE
-                    serializer = self.get_serializer(
-                        data=experience_data
-                    )
-                    serializer.is_valid(raise_exception=True)
-                    self.perform_update(serializer)
-                    
-            except Exception as e:
-                # ✅ Catch error for processing this item
-                logger.error(f"Error processing experience item {i+1}: {str(e)}")
-                errors.append(f"Error processing experience {i+1}: {str(e)}")
-
-        # ✅ Check for errors after the loop
-        if errors:
+        # Rows are driven by the main field, 'institution'
+        rows = get_form_rows(
+            request.POST,
+            ("institution", "from_year", "to_year", "designation", "id"),
+            nullable=("from_year", "to_year", "id"),
+        )
+
+        # ✅ Validate all rows at once, then one bulk_update + one bulk_create
+        serializer = self.get_serializer(data=rows, many=True)
+        if not serializer.is_valid():
+            errors = serializer.row_errors("experience")
+            logger.error(f"Error updating experiences: {errors}")
             return render_toast_message_for_api(
                 "Experience", "; ".join(errors), "error"
             )
+        self.perform_update(serializer)
+        # Bulk writes skip the post_save cache invalidation
+        bump_profile_version(request.user.id)
 
         # ✅ Return success if no errors
         return render_toast_message_for_api(
@@ -424,7 +420,7 @@ class UpdateSpecializationAPIView(DoctorRequiredMixin, UpdateAPIView):
         )
 
 
-class DoctorsListView(ListView):
+class DoctorsListView(CursorPaginationMixin, ListView):
     model = User
     context_object_name = "doctors"
     template_name = "doctors/list.html"
@@ -435,63 +431,62 @@ class DoctorsListView(ListView):
             role=User.RoleChoices.DOCTOR, 
             is_superuser=False, 
             is_active=True
-        ).select_related("profile").prefetch_related(
-            Prefetch(
-                'reviews_received',
-                queryset=Review.objects.select_related('patient', 'patient__profile')
-            )
-        )
+        ).select_related("profile")
 
         # Handle search query - sanitize input
         search_query = self.request.GET.get("q", "").strip()
         if search_query:
             # Limit search query length to prevent DOS
             search_query = re.sub(r'[^\w\s\-\']', '', search_query)[:100]
-            queryset = queryset.filter(
-                Q(first_name__icontains=search_query)
-                | Q(last_name__icontains=search_query)
-                | Q(profile__specialization__icontains=search_query)
-                | Q(profile__city__icontains=search_query)
-            )
+            queryset = search_doctors(queryset, search_query)
 
-        # Handle gender filter - validate against allowed values
-        gender = self.request.GET.getlist("gender")
-        allowed_genders = ['male', 'female', 'other']
-        if gender:
-            validated_genders = [g for g in gender if g in allowed_genders]
-            if validated_genders:
-                queryset = queryset.filter(profile__gender__in=validated_genders)
-
-        # Handle specialization filter - validate against existing specializations
-        specializations = self.request.GET.getlist("specialization")
-        if specializations:
-            # Sanitize and validate
-            valid_specializations = []
-            for spec in specializations:
-                cleaned_spec = spec.strip()[:255]  # Limit length
-                if cleaned_spec:
-                    valid_specializations.append(cleaned_spec)
-            
-            if valid_specializations:
-                queryset = queryset.filter(
-                    profile__specialization__in=valid_specializations
-                )
+        # Handle gender, specialization, city and price filters (see
+        # doctors.facets); the facet counts are computed before filtering
+        selected = parse_selection(self.request.GET)
+        self.facets = directory_facets(queryset, selected, searched=bool(search_query))
+        queryset = filter_queryset(queryset, selected)
 
-        # Handle sorting - validate against allowed values
+        # Handle sorting - validate against allowed values. Every ordering
+        # ends with the pk and has no NULLs, as cursor pagination needs
         sort_by = self.request.GET.get("sort", "").strip()
         allowed_sorts = {
-            "price_low": "profile__price_per_consultation",
-            "price_high": "-profile__price_per_consultation",
-            "rating": "-rating",
-            "experience": "-profile__experience"
+            "price_low": ("consultation_price", "pk"),
+            "price_high": ("-consultation_price", "-pk"),
+            "rating": ("-profile__rating_average", "-pk"),
+            "experience": ("practising_since", "-pk"),
         }
-        
+
+        if sort_by in ("price_low", "price_high"):
+            queryset = queryset.annotate(
+                consultation_price=Coalesce(
+                    "profile__price_per_consultation", Value(Decimal(0))
+                )
+            )
+        elif sort_by == "experience":
+            # Earliest year in practice; doctors without one come last
+            first_year = (
+                Experience.objects.filter(
+                    user=OuterRef("pk"), from_year__isnull=False
+                )
+                .order_by("from_year")
+                .values("from_year")[:1]
+            )
+            queryset = queryset.annotate(
+                practising_since=Coalesce(Subquery(first_year), Value(9999))
+            )
+
         if sort_by in allowed_sorts:
-            queryset = queryset.order_by(allowed_sorts[sort_by])
+            self.ordering = allowed_sorts[sort_by]
+        elif "search_rank" in queryset.query.annotations:
+            self.ordering = ("-search_rank", "-pk")
         else:
-            queryset = queryset.order_by("-pk")
+            self.ordering = ("-pk",)
 
-        return queryset
+        return queryset.order_by(*self.ordering)
+
+    def get_pagination_count(self, queryset):
+        # The facets already counted the results: no COUNT query
+        return self.facets.count
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -499,35 +494,33 @@ class DoctorsListView(ListView):
         # Add search query to context
         context["search_query"] = self.request.GET.get("q")
 
-        # Add unique specializations to context
-        specializations = (
-            User.objects.filter(role=User.RoleChoices.DOCTOR, is_active=True)
-            .exclude(profile__specialization__isnull=True)
-            .values_list("profile__specialization", flat=True)
-            .distinct()
-        )
-
-        context["specializations"] = sorted(
-            list(filter(None, specializations))
-        )
+        # ✅ Facet counts come from one grouped query (cached when unfiltered)
+        context["facets"] = self.facets
+        context["facet_widgets"] = [
+            ("Gender", "gender", self.facets["gender"]),
+            ("Select Specialist", "specialization", self.facets["specialization"]),
+            ("City", "city", self.facets["city"]),
+            ("Consultation Fee", "price", self.facets["price"]),
+        ]
 
         return context
 
 
-class AppointmentListView(DoctorRequiredMixin, ListView):
+class AppointmentListView(DoctorRequiredMixin, CursorPaginationMixin, ListView):
     model = Booking
     context_object_name = "appointments"
     template_name = "doctors/appointments.html"
     paginate_by = 10
+    ordering = ("-appointment_date", "-appointment_time", "id")
 
     def get_queryset(self):
-        return (
-            self.model.objects.select_related(
-                "doctor", "doctor__profile", "patient", "patient__profile"
-            )
-            .filter(doctor=self.request.user)
-            .order_by("-appointment_date", "-appointment_time")
-        )
+        return self.model.objects.select_related(
+            "doctor",
+            "doctor__profile",
+            "patient",
+            "patient__profile",
+            "prescription",
+        ).filter(doctor=self.request.user)
 
 
 class AppointmentDetailView(DoctorRequiredMixin, DetailView):
@@ -586,32 +579,40 @@ class AppointmentActionView(DoctorRequiredMixin, View):
 class MyPatientsView(DoctorRequiredMixin, ListView):
     template_name = "doctors/my-patients.html"
     context_object_name = "patients"
+    paginate_by = 10
 
     def get_queryset(self):
+        today = timezone.now().date()
+        # Filtering on the relation before annotating restricts every
+        # aggregate below to this doctor's bookings (one GROUP BY query)
         return (
             User.objects.filter(
                 patient_appointments__doctor=self.request.user, role="patient"
             )
-            .distinct()
             .select_related("profile")
-        )
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        # Get appointment counts for each patient
-        patient_stats = {}
-        for patient in context["patients"]:
-            stats = Booking.objects.filter(
-                doctor=self.request.user, patient=patient
-            ).aggregate(
-                total_appointments=Count("id"),
+            .annotate(
+                total_appointments=Count("patient_appointments"),
                 completed_appointments=Count(
-                    "id", filter=Q(status="completed")
+                    "patient_appointments",
+                    filter=Q(patient_appointments__status="completed"),
+                ),
+                last_visit=Max(
+                    "patient_appointments__appointment_date",
+                    filter=Q(patient_appointments__appointment_date__lte=today),
+                ),
+                next_appointment=Min(
+                    "patient_appointments__appointment_date",
+                    filter=Q(
+                        patient_appointments__appointment_date__gte=today,
+                        patient_appointments__status__in=[
+                            "pending",
+                            "confirmed",
+                        ],
+                    ),
                 ),
             )
-            patient_stats[patient.id] = stats
-        context["patient_stats"] = patient_stats
-        return context
+            .order_by(F("last_visit").desc(nulls_last=True), "id")
+        )
 
 
 class AppointmentHistoryView(DoctorRequiredMixin, ListView):
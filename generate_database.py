@@ -1,18 +1,39 @@
+import argparse
+import csv
 import json
 import random
 import datetime
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Tuple, Any
+from typing import Dict, Iterable, Iterator, Tuple, Any
 
 # --- Constants ---
 NUM_DOCTORS = 50
 NUM_PATIENTS = 100
+DEFAULT_SEED = 42
+# Số bản ghi được ghi ra tệp mỗi lần (không giữ toàn bộ dữ liệu trong RAM)
+CHUNK_SIZE = 10_000
 
 MODEL_USER = "accounts.user"
 MODEL_PROFILE = "accounts.profile"
 # Sử dụng pathlib.Path để xử lý đường dẫn một cách hiện đại và an toàn
 OUTPUT_FILE_PATH = Path("database_test/database_data.json")
 
+# Các cột của định dạng CSV (mỗi model một tệp: users.csv, profiles.csv)
+CSV_FILES = {MODEL_USER: "users.csv", MODEL_PROFILE: "profiles.csv"}
+CSV_COLUMNS = {
+    MODEL_USER: [
+        "pk", "password", "username", "email", "first_name", "last_name",
+        "role", "is_active", "date_joined",
+    ],
+    MODEL_PROFILE: [
+        "pk", "user", "phone", "dob", "about", "specialization", "gender",
+        "address", "city", "state", "postal_code", "country",
+        "price_per_consultation", "is_available", "blood_group", "allergies",
+        "medical_conditions",
+    ],
+}
+
 # Mật khẩu "password123"
 PASSWORD_HASH = "pbkdf2_sha256$260000$HQyGxzxfOxv6nLKI8zF$w9Nmz1Rxm1fPY1HzJ2MU7MgKBfTJ1RfF3q9M1wJvXvQ="
 
@@ -196,90 +217,202 @@ def _create_user(pk: int, role: str, role_id: int) -> Tuple[Dict[str, Any], str]
     return user_data, gender
 
 
-# --- Main Function ---
+# --- Record Generators ---
+
+def _doctor_profile(pk: int, gender: str) -> Dict[str, Any]:
+    spec = random.choice(SPECIALIZATIONS)
+    return {
+        "model": MODEL_PROFILE,
+        "pk": pk,
+        "fields": {
+            "user": pk,
+            "phone": f"+84 09 {random.randint(10000000, 99999999)}",
+            "dob": _generate_random_dob(1960, 1990), # Sửa lỗi DOB
+            "about": f"Tốt nghiệp {random.choice(MEDICAL_UNIVERSITIES)}. {random.randint(5, 20)} năm kinh nghiệm trong {spec}.",
+            "specialization": spec,
+            "gender": gender,
+            "address": f"Số {random.randint(1, 99)}, {random.choice(STREETS)}, {random.choice(DISTRICTS)}",
+            "city": random.choice(CITIES_PROVINCES),
+            "state": random.choice(DIVISIONS),
+            "postal_code": f"{random.randint(100000, 999999)}",
+            "country": "Vietnam",
+            "price_per_consultation": random.randint(200000, 1000000),
+            "is_available": True,
+        },
+    }
+
+
+def _patient_profile(pk: int, gender: str) -> Dict[str, Any]:
+    # Các đầu số điện thoại mới và phổ biến ở Việt Nam
+    patient_phone_prefix = random.choice(['03', '05', '07', '08'])
+    return {
+        "model": MODEL_PROFILE,
+        "pk": pk,
+        "fields": {
+            "user": pk,
+            "phone": f"+84 {patient_phone_prefix} {random.randint(10000000, 99999999)}", # SĐT thực tế hơn
+            "dob": _generate_random_dob(1970, 2025), # Sửa lỗi DOB
+            "gender": gender,
+            "address": f"Căn hộ {random.randint(101, 909)}, Tòa nhà {random.choice(['A', 'B', 'C'])}{random.randint(1, 5)}, {random.choice(PATIENT_DISTRICTS)}",
+            "city": random.choice(CITIES_PROVINCES),
+            "state": random.choice(DIVISIONS),
+            "postal_code": f"{random.randint(100000, 999999)}",
+            "country": "Vietnam",
+            "blood_group": random.choice(BLOOD_GROUPS),
+            "allergies": random.choice(ALLERGIES),
+            "medical_conditions": random.choice(MEDICAL_CONDITIONS),
+        },
+    }
+
 
-def generate_data():
+def iter_records(num_doctors: int, num_patients: int) -> Iterator[Dict[str, Any]]:
     """
-    Hàm chính tạo tất cả dữ liệu.
+    Sinh lần lượt từng bản ghi (user rồi đến profile của user đó),
+    không giữ danh sách trong bộ nhớ.
     """
-    data: List[Dict[str, Any]] = []
     current_pk = 1
+    for role, count, make_profile in (
+        ("doctor", num_doctors, _doctor_profile),
+        ("patient", num_patients, _patient_profile),
+    ):
+        for i in range(1, count + 1):
+            user_data, gender = _create_user(current_pk, role, i)
+            yield user_data
+            yield make_profile(current_pk, gender)
+            current_pk += 1
+
+
+def _chunks(records: Iterable[Any], size: int) -> Iterator[list]:
+    records = iter(records)
+    while chunk := list(islice(records, size)):
+        yield chunk
+
+
+# --- Writers ---
+
+def write_json(records: Iterable[Dict[str, Any]], path: Path, chunk_size: int) -> int:
+    """Tệp fixture JSON (cho `loaddata`), ghi từng phần thay vì json.dump."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for chunk in _chunks(records, chunk_size):
+            f.write(
+                ("," if count else "")
+                + ",".join(
+                    "\n" + json.dumps(record, ensure_ascii=False)
+                    for record in chunk
+                )
+            )
+            count += len(chunk)
+        f.write("\n]\n")
+    return count
+
+
+def write_ndjson(records: Iterable[Dict[str, Any]], path: Path, chunk_size: int) -> int:
+    """Mỗi dòng một bản ghi (định dạng "jsonl" của `loaddata`)."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for chunk in _chunks(records, chunk_size):
+            f.writelines(
+                json.dumps(record, ensure_ascii=False) + "\n" for record in chunk
+            )
+            count += len(chunk)
+    return count
+
+
+def write_csv(records: Iterable[Dict[str, Any]], directory: Path, chunk_size: int) -> int:
+    """users.csv và profiles.csv trong thư mục `directory`."""
+    directory.mkdir(parents=True, exist_ok=True)
+    count = 0
+    files = {
+        model: open(directory / name, "w", encoding="utf-8", newline="")
+        for model, name in CSV_FILES.items()
+    }
+    try:
+        writers = {}
+        for model, f in files.items():
+            writers[model] = csv.DictWriter(f, CSV_COLUMNS[model])
+            writers[model].writeheader()
+        for chunk in _chunks(records, chunk_size):
+            rows = {model: [] for model in files}
+            for record in chunk:
+                rows[record["model"]].append(
+                    {"pk": record["pk"], **record["fields"]}
+                )
+            for model, model_rows in rows.items():
+                writers[model].writerows(model_rows)
+            count += len(chunk)
+    finally:
+        for f in files.values():
+            f.close()
+    return count
+
+
+WRITERS = {"json": write_json, "ndjson": write_ndjson, "csv": write_csv}
 
-    print(f"Generating {NUM_DOCTORS} doctors...")
-    # Generate doctors
-    for i in range(1, NUM_DOCTORS + 1):
-        user_pk = current_pk
-        profile_pk = current_pk
-
-        user_data, gender = _create_user(user_pk, "doctor", i)
-        data.append(user_data)
-
-        # Doctor Profile
-        spec = random.choice(SPECIALIZATIONS)
-        doctor_profile = {
-            "model": MODEL_PROFILE,
-            "pk": profile_pk,
-            "fields": {
-                "user": user_pk,
-                "phone": f"+84 09 {random.randint(10000000, 99999999)}",
-                "dob": _generate_random_dob(1960, 1990), # Sửa lỗi DOB
-                "about": f"Tốt nghiệp {random.choice(MEDICAL_UNIVERSITIES)}. {random.randint(5, 20)} năm kinh nghiệm trong {spec}.",
-                "specialization": spec,
-                "gender": gender,
-                "address": f"Số {random.randint(1, 99)}, {random.choice(STREETS)}, {random.choice(DISTRICTS)}",
-                "city": random.choice(CITIES_PROVINCES),
-                "state": random.choice(DIVISIONS),
-                "postal_code": f"{random.randint(100000, 999999)}",
-                "country": "Vietnam",
-                "price_per_consultation": random.randint(200000, 1000000),
-                "is_available": True,
-            },
-        }
-        data.append(doctor_profile)
-        current_pk += 1
-
-    print(f"Generating {NUM_PATIENTS} patients...")
-    # Generate patients
-    for i in range(1, NUM_PATIENTS + 1):
-        user_pk = current_pk
-        profile_pk = current_pk
-
-        user_data, gender = _create_user(user_pk, "patient", i)
-        data.append(user_data)
-
-        # Patient Profile
-        # Các đầu số điện thoại mới và phổ biến ở Việt Nam
-        patient_phone_prefix = random.choice(['03', '05', '07', '08'])
-        patient_profile = {
-            "model": MODEL_PROFILE,
-            "pk": profile_pk,
-            "fields": {
-                "user": user_pk,
-                "phone": f"+84 {patient_phone_prefix} {random.randint(10000000, 99999999)}", # SĐT thực tế hơn
-                "dob": _generate_random_dob(1970, 2025), # Sửa lỗi DOB
-                "gender": gender,
-                "address": f"Căn hộ {random.randint(101, 909)}, Tòa nhà {random.choice(['A', 'B', 'C'])}{random.randint(1, 5)}, {random.choice(PATIENT_DISTRICTS)}",
-                "city": random.choice(CITIES_PROVINCES),
-                "state": random.choice(DIVISIONS),
-                "postal_code": f"{random.randint(100000, 999999)}",
-                "country": "Vietnam",
-                "blood_group": random.choice(BLOOD_GROUPS),
-                "allergies": random.choice(ALLERGIES),
-                "medical_conditions": random.choice(MEDICAL_CONDITIONS),
-            },
-        }
-        data.append(patient_profile)
-        current_pk += 1
 
-    # Đảm bảo thư mục (directory) tồn tại trước khi ghi tệp
-    OUTPUT_FILE_PATH.parent.mkdir(parents=True, exist_ok=True)
+# --- Main Function ---
 
-    print(f"Writing data to {OUTPUT_FILE_PATH}...")
-    with open(OUTPUT_FILE_PATH, "w", encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    
-    print(f"Done. Generated {current_pk - 1} users and profiles.")
+def generate_data(
+    num_doctors: int = NUM_DOCTORS,
+    num_patients: int = NUM_PATIENTS,
+    output: Path = OUTPUT_FILE_PATH,
+    output_format: str = "json",
+    seed: int = DEFAULT_SEED,
+    chunk_size: int = CHUNK_SIZE,
+) -> int:
+    """
+    Hàm chính tạo tất cả dữ liệu. Cùng `seed` luôn cho cùng một dữ liệu.
+    Trả về số bản ghi đã ghi.
+    """
+    random.seed(seed)
+
+    # Đảm bảo thư mục (directory) tồn tại trước khi ghi tệp
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    print(f"Generating {num_doctors} doctors and {num_patients} patients to {output} ({output_format})...")
+    count = WRITERS[output_format](
+        iter_records(num_doctors, num_patients), output, chunk_size
+    )
+    print(f"Done. Generated {num_doctors + num_patients} users and profiles ({count} records).")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate test users and profiles for RoydClinic. "
+        "Load json/ndjson with `manage.py fast_load` (or loaddata), "
+        "csv with `manage.py fast_load --format csv`."
+    )
+    parser.add_argument("--doctors", type=int, default=NUM_DOCTORS)
+    parser.add_argument("--patients", type=int, default=NUM_PATIENTS)
+    parser.add_argument("--format", choices=WRITERS, default="json", dest="output_format")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help=f"File (a directory for csv), default {OUTPUT_FILE_PATH}",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    output = args.output
+    if output is None:
+        output = {
+            "json": OUTPUT_FILE_PATH,
+            "ndjson": OUTPUT_FILE_PATH.with_suffix(".jsonl"),
+            "csv": OUTPUT_FILE_PATH.parent / "csv",
+        }[args.output_format]
+
+    generate_data(
+        num_doctors=args.doctors,
+        num_patients=args.patients,
+        output=output,
+        output_format=args.output_format,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+    )
 
 
 if __name__ == "__main__":
-    generate_data()
\ No newline at end of file
+    main()
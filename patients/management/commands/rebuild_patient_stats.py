@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import User
+from patients.models import PatientStats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the cached per-patient booking stats"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        patient_ids = User.objects.filter(
+            role=User.RoleChoices.PATIENT
+        ).values_list("id", flat=True).order_by("id")
+
+        total = 0
+        batch = []
+        for patient_id in patient_ids.iterator(chunk_size=batch_size):
+            batch.append(patient_id)
+            if len(batch) == batch_size:
+                PatientStats.refresh(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            PatientStats.refresh(batch)
+            total += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt stats for {total} patients")
+        )
@@ -1,3 +1,73 @@
 from django.db import models
+from django.db.models import Count, Max, Q, Sum
 
-# Create your models here.
+from accounts.models import User
+
+
+class PatientStats(models.Model):
+    """
+    Cached per-patient booking totals for the admin patients list.
+
+    Only read when ``settings.ADMIN_PATIENT_STATS_CACHED`` is enabled; kept
+    current by patients.signals and rebuilt by ``rebuild_patient_stats``.
+    """
+
+    patient = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name="stats"
+    )
+    total_appointments = models.PositiveIntegerField(default=0)
+    completed_appointments = models.PositiveIntegerField(default=0)
+    total_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    last_visit = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Patient stats"
+
+    def __str__(self):
+        return f"Stats of {self.patient}"
+
+    @classmethod
+    def refresh(cls, patient_ids):
+        """Recompute the stats of ``patient_ids`` with one grouped query."""
+        from bookings.models import Booking
+
+        rows = {
+            row.pop("patient_id"): row
+            for row in Booking.objects.filter(patient_id__in=patient_ids)
+            .values("patient_id")
+            .annotate(
+                total_appointments=Count("id"),
+                completed_appointments=Count(
+                    "id", filter=Q(status="completed")
+                ),
+                total_paid=Sum("fee", filter=Q(status="completed")),
+                last_visit=Max("appointment_date"),
+            )
+            .order_by()
+        }
+        stats = []
+        for patient_id in patient_ids:
+            row = rows.get(patient_id, {})
+            stats.append(
+                cls(
+                    patient_id=patient_id,
+                    total_appointments=row.get("total_appointments", 0),
+                    completed_appointments=row.get("completed_appointments", 0),
+                    total_paid=row.get("total_paid") or 0,
+                    last_visit=row.get("last_visit"),
+                )
+            )
+        cls.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=["patient"],
+            update_fields=[
+                "total_appointments",
+                "completed_appointments",
+                "total_paid",
+                "last_visit",
+                "updated_at",
+            ],
+            batch_size=1000,
+        )
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bookings.models import Booking
+from patients.tasks import refresh_patient_stats as refresh_stats_task
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def refresh_patient_stats(sender, instance, raw=False, **kwargs):
+    if raw or not settings.ADMIN_PATIENT_STATS_CACHED:
+        return
+    refresh_stats_task.defer(
+        patient_id=instance.patient_id,
+        unique_key=f"patient-stats:{instance.patient_id}",
+    )
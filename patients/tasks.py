@@ -0,0 +1,7 @@
+from core.jobs import task
+from patients.models import PatientStats
+
+
+@task
+def refresh_patient_stats(patient_id):
+    PatientStats.refresh([patient_id])
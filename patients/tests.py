@@ -1,3 +1,7 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+# Query budgets: see doctors/tests.py
+
+
+def test_patient_dashboard_queries(query_budget, clinic):
+    query_budget(reverse("patients:dashboard"), 4, user=clinic.patient)
@@ -2,6 +2,7 @@ from django.urls import path
 
 from .views import (
     PatientDashboardView,
+    PatientAppointmentsView,
     PatientProfileUpdateView,
     AppointmentDetailView,
     AppointmentCancelView,
@@ -14,6 +15,11 @@ app_name = "patients"
 
 urlpatterns = [
     path("dashboard/", PatientDashboardView.as_view(), name="dashboard"),
+    path(
+        "dashboard/appointments/<str:bucket>/",
+        PatientAppointmentsView.as_view(),
+        name="dashboard-appointments",
+    ),
     path(
         "profile-settings/",
         PatientProfileUpdateView.as_view(),
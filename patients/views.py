@@ -1,18 +1,71 @@
+from urllib.parse import urlencode
+
+from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from django.views.generic import UpdateView, DetailView, View, CreateView
 from django.views.generic.base import TemplateView
 from django.contrib import messages
 from django.template.loader import render_to_string
-from django.http import HttpResponse
+from django.core.exceptions import BadRequest
+from django.http import Http404, HttpResponse
 from django.contrib.auth import update_session_auth_hash
 
 
 from accounts.models import User
-from bookings.models import Booking
+from accounts.tasks import build_avatar_thumbnails
+from bookings.models import ACTIVE_BOOKING_STATUSES, Booking
 from mixins.custom_mixins import PatientRequiredMixin
 from patients.forms import PatientProfileForm, ChangePasswordForm, ReviewForm
 from core.models import Review
+from utils.images import InvalidImageError, sanitize_avatar
+from utils.pagination import InvalidCursor, keyset_paginate
+
+
+APPOINTMENTS_PER_PAGE = 10
+
+
+def appointment_buckets(today):
+    """
+    Dashboard tabs: key -> (label, filter, keyset ordering). Every ordering
+    starts with appointment_date so the (patient, appointment_date) index
+    serves it; id breaks ties for the cursor.
+    """
+    upcoming = Q(status__in=ACTIVE_BOOKING_STATUSES, appointment_date__gte=today)
+    cancelled = Q(status="cancelled")
+    return {
+        "upcoming": (
+            "Upcoming",
+            upcoming,
+            ("appointment_date", "appointment_time", "id"),
+        ),
+        "past": (
+            "Past",
+            ~upcoming & ~cancelled,
+            ("-appointment_date", "-appointment_time", "-id"),
+        ),
+        "cancelled": (
+            "Cancelled",
+            cancelled,
+            ("-appointment_date", "-appointment_time", "-id"),
+        ),
+    }
+
+
+def patient_appointments(patient, bucket, cursor=None, today=None):
+    """One keyset page of a dashboard bucket: (rows, next_cursor)."""
+    today = today or timezone.localdate()
+    _, condition, ordering = appointment_buckets(today)[bucket]
+    queryset = Booking.objects.select_related("doctor", "doctor__profile").filter(
+        condition, patient=patient
+    )
+    return keyset_paginate(queryset, ordering, cursor, APPOINTMENTS_PER_PAGE)
+
+
+def appointments_page_url(bucket, cursor=None):
+    url = reverse("patients:dashboard-appointments", args=[bucket])
+    return f"{url}?{urlencode({'cursor': cursor})}" if cursor else url
 
 
 class PatientDashboardView(PatientRequiredMixin, TemplateView):
@@ -20,14 +73,66 @@ class PatientDashboardView(PatientRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["appointments"] = (
-            Booking.objects.select_related("doctor", "doctor__profile")
-            .filter(patient=self.request.user)
-            .order_by("-appointment_date", "-appointment_time")
+        today = timezone.localdate()
+        buckets = appointment_buckets(today)
+
+        # ✅ All tab counts in one query
+        counts = Booking.objects.filter(patient=self.request.user).aggregate(
+            **{
+                key: Count("id", filter=condition)
+                for key, (_, condition, _) in buckets.items()
+            }
         )
+
+        context["buckets"] = []
+        for key, (label, _, _) in buckets.items():
+            bucket = {
+                "key": key,
+                "label": label,
+                "count": counts[key],
+                "url": appointments_page_url(key),
+                "appointments": None,
+            }
+            # Only the first tab is rendered now; the others load over
+            # HTMX when they are shown
+            if key == "upcoming":
+                rows, cursor = patient_appointments(
+                    self.request.user, key, today=today
+                )
+                bucket["appointments"] = rows
+                bucket["next_url"] = (
+                    appointments_page_url(key, cursor) if cursor else None
+                )
+            context["buckets"].append(bucket)
         return context
 
 
+class PatientAppointmentsView(PatientRequiredMixin, View):
+    """HTMX partial: the next rows of one dashboard bucket ("load more")."""
+
+    def get(self, request, bucket):
+        if bucket not in ("upcoming", "past", "cancelled"):
+            raise Http404
+        cursor = request.GET.get("cursor")
+        try:
+            rows, next_cursor = patient_appointments(request.user, bucket, cursor)
+        except InvalidCursor:
+            raise BadRequest("Invalid cursor")
+        return render(
+            request,
+            "patients/partials/appointment-rows.html",
+            {
+                "appointments": rows,
+                "first_page": not cursor,
+                "next_url": (
+                    appointments_page_url(bucket, next_cursor)
+                    if next_cursor
+                    else None
+                ),
+            },
+        )
+
+
 class PatientProfileUpdateView(PatientRequiredMixin, UpdateView):
     model = User
     template_name = "patients/profile-setting.html"
@@ -41,9 +146,14 @@ class PatientProfileUpdateView(PatientRequiredMixin, UpdateView):
         user = form.save(commit=False)
         profile = user.profile
 
-        # Handle profile image upload
-        if self.request.FILES.get("avatar"):
-            profile.image = self.request.FILES["avatar"]
+        # Handle profile image upload (re-encoded without EXIF metadata)
+        avatar = self.request.FILES.get("avatar")
+        if avatar:
+            try:
+                profile.avatar = sanitize_avatar(avatar)
+            except InvalidImageError as e:
+                form.add_error("avatar", str(e))
+                return self.form_invalid(form)
 
         # Update profile fields
         profile_fields = [
@@ -68,6 +178,8 @@ class PatientProfileUpdateView(PatientRequiredMixin, UpdateView):
         # Save both user and profile
         user.save()
         profile.save()
+        if avatar:
+            build_avatar_thumbnails.defer(profile_id=profile.pk)
 
         messages.success(self.request, "Profile updated successfully")
         return redirect(self.success_url)
@@ -45,4 +45,9 @@ $(document).ready(function () {
     $(".main_item").on('click', '.remove_time_row', function () {
         $(this).parent().parent().remove();
     });
+
+    $(".main_item").on('click', '.del_time_row', function (e) {
+        e.preventDefault();
+        $(this).closest('.hour-item').remove();
+    });
 });
\ No newline at end of file
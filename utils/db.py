@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import ExtractYear
+
+
+def age_from_dob(field, today=None):
+    """
+    SQL expression for the age in whole years of the date ``field``
+    (NULL when the date is NULL).
+    """
+    today = today or date.today()
+    birthday_pending = Q(**{f"{field}__month__gt": today.month}) | Q(
+        **{f"{field}__month": today.month, f"{field}__day__gt": today.day}
+    )
+    return Case(
+        When(**{f"{field}__isnull": True}, then=Value(None)),
+        default=Value(today.year)
+        - ExtractYear(F(field))
+        - Case(When(birthday_pending, then=Value(1)), default=Value(0)),
+        output_field=IntegerField(),
+    )
@@ -0,0 +1,89 @@
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Square avatar variants (2x the largest CSS size they are shown at)
+AVATAR_SIZES = {
+    "dashboard": 96,  # table rows, navbar, review lists
+    "list": 240,  # doctor directory cards, booking page, sidebars
+    "profile": 400,  # public profile header, home page cards
+}
+AVATAR_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+AVATAR_MAX_SIZE = 1024
+AVATAR_QUALITY = 82
+
+
+class InvalidImageError(ValueError):
+    pass
+
+
+def _open_image(file):
+    try:
+        image = Image.open(file)
+        image.load()
+    except (UnidentifiedImageError, OSError) as e:
+        raise InvalidImageError("Uploaded file is not a valid image") from e
+    # Apply the EXIF orientation before the metadata is dropped
+    return ImageOps.exif_transpose(image)
+
+
+def _encode(image, image_format):
+    if image_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+    options = {"optimize": True}
+    if image_format != "PNG":
+        options["quality"] = AVATAR_QUALITY
+    buffer = BytesIO()
+    # No exif=/icc_profile= arguments: the output carries no metadata
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def sanitize_avatar(upload):
+    """
+    Re-encode an uploaded avatar without EXIF/metadata, with its
+    orientation applied and bounded to ``AVATAR_MAX_SIZE`` pixels.
+
+    Returns a ``ContentFile`` to assign to ``Profile.avatar``. Raises
+    ``InvalidImageError`` if Pillow cannot read the upload.
+    """
+    image = _open_image(upload)
+    image.thumbnail((AVATAR_MAX_SIZE, AVATAR_MAX_SIZE), Image.LANCZOS)
+    # Keep transparency (PNG), everything else becomes JPEG
+    if image.mode in ("RGBA", "LA", "P"):
+        return ContentFile(_encode(image, "PNG"), name="avatar.png")
+    return ContentFile(_encode(image, "JPEG"), name="avatar.jpg")
+
+
+def avatar_variant_name(name, size, fmt):
+    """Storage name of a variant, e.g. ``profiles/thumbs/abc_list.webp``."""
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    extension = "jpg" if fmt == "jpeg" else fmt
+    return posixpath.join(directory, "thumbs", f"{stem}_{size}.{extension}")
+
+
+def generate_avatar_variants(field_file):
+    """
+    Write every ``AVATAR_SIZES`` x ``AVATAR_FORMATS`` variant of a stored
+    avatar next to it. Returns the list of storage names written.
+    """
+    storage = field_file.storage
+    with storage.open(field_file.name, "rb") as f:
+        image = _open_image(f)
+
+    names = []
+    for size, pixels in AVATAR_SIZES.items():
+        thumb = ImageOps.fit(image, (pixels, pixels), Image.LANCZOS)
+        for fmt, image_format in AVATAR_FORMATS.items():
+            name = avatar_variant_name(field_file.name, size, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            names.append(
+                storage.save(name, ContentFile(_encode(thumb, image_format)))
+            )
+    return names
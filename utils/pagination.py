@@ -0,0 +1,256 @@
+import base64
+import binascii
+import datetime
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import BadRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder rounds to milliseconds; a cursor must be exact or
+    # rows sharing the millisecond are skipped or repeated
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    """Opaque, URL-safe token for the ordering values of the last row."""
+    data = json.dumps(values, cls=CursorEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if not isinstance(values, list):
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def _output_field(queryset, name):
+    """The field an ordering name (a field path or an annotation) yields."""
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+    model = queryset.model
+    *relations, last = name.split("__")
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    if last == "pk":
+        return model._meta.pk
+    return model._meta.get_field(last)
+
+
+def _row_value(row, name):
+    for attr in name.split("__"):
+        row = getattr(row, attr)
+    return row
+
+
+def reverse_ordering(ordering):
+    return tuple(
+        field[1:] if field.startswith("-") else f"-{field}" for field in ordering
+    )
+
+
+def keyset_filter(queryset, ordering, values):
+    """
+    Q for the rows of ``queryset`` that come after ``values`` in
+    ``ordering`` (field paths or annotations, "-" for descending), i.e. the
+    row-value comparison ``(a, b, c) > (x, y, z)`` spelled out as
+    ``a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)``.
+
+    The fields must be non-nullable and the last one unique (e.g. ``id``).
+    """
+    if len(values) != len(ordering):
+        raise InvalidCursor("Invalid cursor")
+    names = [field.lstrip("-") for field in ordering]
+    fields = [_output_field(queryset, name) for name in names]
+    try:
+        values = [field.to_python(value) for field, value in zip(fields, values)]
+    except Exception as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+    condition = Q()
+    for i, (field, name) in enumerate(zip(ordering, names)):
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= Q(
+            **dict(zip(names[:i], values[:i])), **{f"{name}__{lookup}": values[i]}
+        )
+    return condition
+
+
+def _page_after(queryset, ordering, values, page_size):
+    """Up to page_size + 1 rows after ``values`` (None: from the start)."""
+    queryset = queryset.order_by(*ordering)
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(queryset, ordering, values))
+    # One extra row tells whether there is a next page, without a COUNT
+    return list(queryset[: page_size + 1])
+
+
+def _cursor_values(row, ordering):
+    return [_row_value(row, field.lstrip("-")) for field in ordering]
+
+
+def can_estimate_count(queryset):
+    """Whether estimated_count() of ``queryset`` is an estimate."""
+    return connections[queryset.db].vendor == "postgresql"
+
+
+def estimated_count(queryset):
+    """
+    The PostgreSQL planner's row estimate for ``queryset`` (from the table
+    statistics, no scan), or the exact count on other databases.
+    """
+    if not can_estimate_count(queryset):
+        return queryset.count()
+    plan = json.loads(
+        queryset.select_related(None).order_by().explain(format="json")
+    )
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class CursorPage(Sequence):
+    """
+    A page of a CursorPaginator. Quacks like django.core.paginator.Page
+    where it can; there are no page numbers, only the cursors of the
+    neighbouring pages.
+    """
+
+    cursor_based = True
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self.object_list)} objects>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset pagination over ``ordering``, which must end with a unique,
+    non-nullable field. Cursors are opaque tokens holding the direction and
+    the ordering values of the first or last row shown.
+
+    ``count`` is whatever total the caller could afford (exact, estimated
+    or None, with ``is_estimate`` telling which); the pages never depend
+    on it.
+    """
+
+    def __init__(self, queryset, ordering, per_page, count=None, is_estimate=False):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.count = count
+        self.is_estimate = is_estimate
+
+    def _cursor(self, direction, row):
+        return encode_cursor([direction, *_cursor_values(row, self.ordering)])
+
+    def page(self, cursor=None):
+        """Raises InvalidCursor for a tampered or stale cursor."""
+        direction, values = "next", None
+        if cursor:
+            direction, *values = decode_cursor(cursor) or [None]
+            if direction not in ("next", "prev"):
+                raise InvalidCursor("Invalid cursor")
+
+        # "prev" walks backwards from the first row of the page being left
+        ordering = self.ordering
+        if direction == "prev":
+            ordering = reverse_ordering(ordering)
+        rows = _page_after(self.queryset, ordering, values, self.per_page)
+        more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if direction == "next":
+            has_next, has_previous = more, values is not None
+        else:
+            rows.reverse()
+            has_next, has_previous = True, more
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_next:
+                next_cursor = self._cursor("next", rows[-1])
+            if has_previous:
+                previous_cursor = self._cursor("prev", rows[0])
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+
+def keyset_paginate(queryset, ordering, cursor=None, page_size=10):
+    """
+    One page of ``queryset`` in ``ordering`` after ``cursor``, fetched with
+    a range condition instead of OFFSET so page N costs the same as page 1.
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+
+    A forward-only shortcut over CursorPaginator, for "load more" lists.
+    Raises ``InvalidCursor`` for a tampered or stale cursor.
+    """
+    page = CursorPaginator(queryset, ordering, page_size).page(cursor)
+    return page.object_list, page.next_cursor
+
+
+class CursorPaginationMixin:
+    """
+    Keyset pagination for a ListView, on ``get_ordering()`` (which must end
+    with a unique field), through ``?cursor=``. No OFFSET and no exact
+    COUNT: set ``estimate_count`` to show an estimated total, or override
+    get_pagination_count() when the view knows the exact count anyway.
+
+    Renders with includes/pagination.html like a numbered ListView. A bad
+    cursor is a 400, as everywhere else cursors are accepted.
+    """
+
+    cursor_kwarg = "cursor"
+    estimate_count = False
+
+    def get_pagination_count(self, queryset):
+        return estimated_count(queryset) if self.estimate_count else None
+
+    def count_is_estimate(self, queryset):
+        return self.estimate_count and can_estimate_count(queryset)
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = CursorPaginator(
+            queryset,
+            self.get_ordering(),
+            page_size,
+            count=self.get_pagination_count(queryset),
+            is_estimate=self.count_is_estimate(queryset),
+        )
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise BadRequest("Invalid cursor")
+        return paginator, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,29 @@
+import logging
+
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Manifest-hashed, gzip/brotli pre-compressed static files.
+
+    Vendored theme/plugin files reference a few files that were never
+    shipped (e.g. ``maps/*.js.map`` source maps). Such references are left
+    as they are instead of aborting collectstatic.
+    """
+
+    def url_converter(self, name, hashed_files, template=None):
+        converter = super().url_converter(name, hashed_files, template)
+
+        def convert(matchobj):
+            try:
+                return converter(matchobj)
+            except ValueError:
+                logger.warning(
+                    "%s references missing file %s", name, matchobj["url"]
+                )
+                return matchobj["matched"]
+
+        return convert